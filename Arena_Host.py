@@ -0,0 +1,381 @@
+# ------------------------------
+# Arena Host
+# Headless RPG_TEST battles served over a local socket for bot play-testing.
+# Protocol: one JSON object per line.
+#   {"op":"new","seed":7}                  -> {"sid":1,"state":{...}}
+#   {"sid":1,"op":"skill","skill":"ice"}   -> {"sid":1,"diff":{...}}
+#   {"sid":1,"op":"move","x":1,"y":2}
+#   {"sid":1,"op":"use","tile":[4,4]}      (tile only for fireball/lightning/ice)
+#   {"sid":1,"op":"end"}
+#   {"sid":1,"op":"close"}
+# One connection may drive any number of sessions.
+# Run: python Arena_Host.py --bots 200
+# ------------------------------
+
+import asyncio
+import json
+import random
+import time
+import argparse
+
+# ------------------------------
+# SETTINGS (same rules as RPG_TEST)
+# ------------------------------
+GRID_SIZE = 6
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_TURNS = 500
+SPELLS = ("fireball","lightning","ice")
+SKILLS = ("basic","strong","fireball","lightning","heal","ice")
+
+# ------------------------------
+# HEADLESS UNIT
+# ------------------------------
+class Unit:
+    def __init__(self,name,x,y,hp,hero):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.hp = hp
+        self.max_hp = hp
+        self.hero = hero
+        self.status_effects = {}
+        self.cooldowns = {"strong":0,"fireball":0,"lightning":0,"heal":0,"ice":0}
+
+    def snapshot(self):
+        return {"x":self.x,"y":self.y,"hp":self.hp,
+                "st":dict(self.status_effects),"cd":{k:v for k,v in self.cooldowns.items() if v}}
+
+    def reduce_cooldowns(self):
+        for k in self.cooldowns:
+            if self.cooldowns[k]>0:
+                self.cooldowns[k]-=1
+
+def near(a,x,y):
+    return abs(a.x-x)<=1 and abs(a.y-y)<=1
+
+def percentile(sorted_values,p):
+    return sorted_values[min(len(sorted_values)-1,int(len(sorted_values)*p))]
+
+# ------------------------------
+# BATTLE SESSION
+# ------------------------------
+class Battle:
+    def __init__(self,seed=None):
+        self.rng = random.Random(seed)
+        self.heroes = [Unit("Hero",0,0,30,True),Unit("Mage",0,1,26,True),Unit("Cleric",1,0,28,True)]
+        self.enemies = [Unit("Slime",5,5,12,False),Unit("Goblin",4,4,14,False)]
+        self.characters = self.heroes+self.enemies
+        self.turn_index = 0
+        self.turns = 0
+        self.current_skill = "basic"
+        self.result = None
+        self.sent = {}
+
+    def current(self):
+        return self.characters[self.turn_index]
+
+    # --- skills ---
+    def attack(self,unit,skill,tile=None,target=None):
+        if skill in unit.cooldowns and unit.cooldowns[skill]>0:
+            return False
+        rng = self.rng
+        foes = self.enemies if unit.hero else self.heroes
+        if skill in ("basic","strong"):
+            # heroes hit the first adjacent foe; enemy_ai passes its chosen target
+            target = target or next((e for e in foes if near(unit,e.x,e.y)),None)
+            if not target: return False
+            target.hp -= rng.randint(2,4) if skill=="basic" else rng.randint(4,6)
+            if skill=="strong": unit.cooldowns["strong"]=3
+        elif skill=="heal":
+            unit.hp = min(unit.max_hp,unit.hp+rng.randint(5,8))
+            unit.status_effects["Regen"]=2
+            unit.cooldowns["heal"]=3
+        elif skill in SPELLS:
+            if tile is None: return False
+            tx,ty = tile
+            for e in foes:
+                if not near(e,tx,ty): continue
+                if skill=="fireball":
+                    e.hp -= rng.randint(3,5)
+                    e.status_effects["Burn"]=2
+                elif skill=="lightning":
+                    e.hp -= rng.randint(4,6)
+                    e.status_effects["Shock"]=2
+                    if rng.random()<0.3: e.status_effects["Stun"]=1
+                else:
+                    e.hp -= rng.randint(3,5)
+                    e.status_effects["Freezing"]=1
+            unit.cooldowns[skill] = 4 if skill in ("lightning","ice") else 3
+        else:
+            return False
+        return True
+
+    def start_turn(self,unit):
+        stunned = False
+        if "Freezing" in unit.status_effects:
+            stunned = True
+            del unit.status_effects["Freezing"]
+        for k in list(unit.status_effects):
+            unit.status_effects[k]-=1
+            if k=="Shock": unit.hp-=2
+            elif k=="Burn": unit.hp-=1
+            elif k=="Regen": unit.hp=min(unit.max_hp,unit.hp+2)
+            elif k=="Stun": stunned=True
+            if unit.status_effects[k]<=0:
+                del unit.status_effects[k]
+        if unit.hp<0: unit.hp=0
+        return stunned
+
+    def enemy_ai(self,enemy):
+        alive = [h for h in self.heroes if h.hp>0]
+        if not alive: return
+        target = min(alive,key=lambda h: abs(h.x-enemy.x)+abs(h.y-enemy.y))
+        if abs(enemy.x-target.x)>1:
+            enemy.x += 1 if target.x>enemy.x else -1
+        elif abs(enemy.y-target.y)>1:
+            enemy.y += 1 if target.y>enemy.y else -1
+        if near(enemy,target.x,target.y):
+            self.attack(enemy,"basic",target=target)
+
+    # --- turn loop ---
+    def cleanup_dead(self):
+        # Keeps turn_index on the same unit (or just before its successor if it died).
+        cur = self.characters[self.turn_index]
+        self.enemies = [e for e in self.enemies if e.hp>0]
+        alive = [c for c in self.characters if c.hp>0]
+        if cur in alive:
+            self.turn_index = alive.index(cur)
+        else:
+            self.turn_index = sum(1 for c in self.characters[:self.turn_index] if c.hp>0)-1
+        self.characters = alive
+
+    def check_end(self):
+        if self.result: return True
+        if not self.enemies: self.result = "victory"
+        elif not any(h.hp>0 for h in self.heroes): self.result = "defeat"
+        elif self.turns>=MAX_TURNS: self.result = "draw"
+        return self.result is not None
+
+    def next_turn(self):
+        # Loops where RPG_TEST recurses; stops at the next hero waiting for input.
+        while True:
+            self.cleanup_dead()
+            if self.check_end(): return
+            self.turns += 1
+            self.turn_index = (self.turn_index+1)%len(self.characters)
+            unit = self.current()
+            stunned = self.start_turn(unit)
+            self.cleanup_dead()
+            if self.check_end(): return
+            if unit not in self.characters: continue
+            if stunned:
+                unit.reduce_cooldowns()
+                continue
+            if unit.hero: return
+            self.enemy_ai(unit)
+            unit.reduce_cooldowns()
+
+    # --- commands (set_skill / on_click move / player_use_skill / end_turn) ---
+    def command(self,msg):
+        if self.result: return "over"
+        unit = self.current()
+        op = msg.get("op")
+        if op=="skill":
+            if msg.get("skill") not in SKILLS: return "bad skill"
+            self.current_skill = msg["skill"]
+        elif op=="move":
+            x,y = int(msg["x"]),int(msg["y"])
+            if not (0<=x<GRID_SIZE and 0<=y<GRID_SIZE and near(unit,x,y)): return "out of range"
+            unit.x,unit.y = x,y
+        elif op=="use":
+            tile = msg.get("tile")
+            if self.current_skill in SPELLS and not tile: return "need tile"
+            if not self.attack(unit,self.current_skill,tile): return "not used"
+            unit.reduce_cooldowns()
+            self.next_turn()
+        elif op=="end":
+            unit.reduce_cooldowns()
+            self.next_turn()
+        else:
+            return "bad op"
+        return None
+
+    # --- state diffs ---
+    def state(self):
+        units = {c.name:c.snapshot() for c in self.characters}
+        return {"units":units,"turn":self.current().name if self.characters else None,
+                "skill":self.current_skill,"result":self.result}
+
+    def diff(self):
+        now = self.state()
+        old = self.sent
+        out = {}
+        units = {}
+        for name,snap in now["units"].items():
+            prev = old.get("units",{}).get(name,{})
+            changed = {k:v for k,v in snap.items() if prev.get(k)!=v}
+            if changed: units[name] = changed
+        if units: out["units"] = units
+        gone = [n for n in old.get("units",{}) if n not in now["units"]]
+        if gone: out["dead"] = gone
+        for k in ("turn","skill","result"):
+            if old.get(k)!=now[k]: out[k] = now[k]
+        self.sent = now
+        return out
+
+# ------------------------------
+# SERVER
+# ------------------------------
+class ArenaHost:
+    def __init__(self):
+        self.sessions = {}
+        self.next_sid = 0
+        self.stats = {}  # sid -> [commands, total seconds, worst seconds]
+        self.started = time.perf_counter()
+        self.finished = 0
+
+    def handle(self,msg):
+        t0 = time.perf_counter()
+        if msg.get("op")=="new":
+            self.next_sid += 1
+            sid = self.next_sid
+            battle = Battle(msg.get("seed"))
+            self.sessions[sid] = battle
+            self.stats[sid] = [0,0.0,0.0]
+            battle.diff()
+            reply = {"sid":sid,"state":battle.sent}
+        else:
+            sid = msg.get("sid")
+            battle = self.sessions.get(sid)
+            if battle is None:
+                return {"sid":sid,"error":"no session"}
+            if msg.get("op")=="close":
+                del self.sessions[sid]
+                self.finished += 1
+                return {"sid":sid,"closed":True}
+            err = battle.command(msg)
+            reply = {"sid":sid,"diff":battle.diff()}
+            if err: reply["error"] = err
+        dt = time.perf_counter()-t0
+        st = self.stats[sid]
+        st[0] += 1
+        st[1] += dt
+        st[2] = max(st[2],dt)
+        return reply
+
+    async def serve_client(self,reader,writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    reply = self.handle(json.loads(line))
+                except (ValueError,KeyError,TypeError) as e:
+                    reply = {"error":f"bad request: {e}"}
+                writer.write(json.dumps(reply,separators=(",",":")).encode()+b"\n")
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    def report(self):
+        elapsed = time.perf_counter()-self.started
+        total = sum(s[0] for s in self.stats.values())
+        if not total:
+            return "No commands handled."
+        means = sorted(s[1]/s[0] for s in self.stats.values() if s[0])
+        worst = max(s[2] for s in self.stats.values())
+        lines = [f"Sessions: {len(self.stats)} ({self.finished} closed, {len(self.sessions)} open)",
+                 f"Commands: {total} in {elapsed:.2f}s ({total/elapsed:.0f}/s)",
+                 f"Per-session mean latency: median {percentile(means,0.5)*1e6:.0f}us, "
+                 f"p99 {percentile(means,0.99)*1e6:.0f}us, worst command {worst*1e6:.0f}us"]
+        return "\n".join(lines)
+
+# ------------------------------
+# STAND-IN BOT CLIENT
+# ------------------------------
+def apply_diff(state,diff):
+    for name,changed in diff.get("units",{}).items():
+        state["units"].setdefault(name,{}).update(changed)
+    for name in diff.get("dead",[]):
+        state["units"].pop(name,None)
+    for k in ("turn","skill","result"):
+        if k in diff: state[k] = diff[k]
+
+def bot_command(state,rng,sid):
+    units = state["units"]
+    me = units[state["turn"]]
+    foes = [u for n,u in units.items() if n in ("Slime","Goblin")]
+    ready = [s for s in SKILLS if not me.get("cd",{}).get(s)]
+    if state["skill"] not in ready or rng.random()<0.2:
+        return {"sid":sid,"op":"skill","skill":rng.choice(ready)}
+    if state["skill"] in SPELLS:
+        f = rng.choice(foes)
+        return {"sid":sid,"op":"use","tile":[f["x"],f["y"]]}
+    if state["skill"] in ("basic","strong"):
+        f = min(foes,key=lambda u: max(abs(u["x"]-me["x"]),abs(u["y"]-me["y"])))
+        if max(abs(f["x"]-me["x"]),abs(f["y"]-me["y"]))>1:
+            x = me["x"]+(f["x"]>me["x"])-(f["x"]<me["x"])
+            y = me["y"]+(f["y"]>me["y"])-(f["y"]<me["y"])
+            return {"sid":sid,"op":"move","x":x,"y":y}
+    if rng.random()<0.05:
+        return {"sid":sid,"op":"end"}
+    return {"sid":sid,"op":"use"}
+
+async def bot(port,seed,battles,rtts,results):
+    reader,writer = await asyncio.open_connection(HOST,port)
+    rng = random.Random(seed)
+    async def ask(msg):
+        t0 = time.perf_counter()
+        writer.write(json.dumps(msg,separators=(",",":")).encode()+b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        rtts.append(time.perf_counter()-t0)
+        return reply
+    for b in range(battles):
+        reply = await ask({"op":"new","seed":seed*1000+b})
+        sid,state = reply["sid"],reply["state"]
+        while not state["result"]:
+            reply = await ask(bot_command(state,rng,sid))
+            apply_diff(state,reply["diff"])
+        results[state["result"]] = results.get(state["result"],0)+1
+        await ask({"sid":sid,"op":"close"})
+    writer.close()
+
+async def main(bots,battles,port):
+    host = ArenaHost()
+    server = await asyncio.start_server(host.serve_client,HOST,port,backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+    rtts,results = [],{}
+    async with server:
+        await asyncio.gather(*(bot(port,i,battles,rtts,results) for i in range(bots)))
+    print(host.report())
+    rtts.sort()
+    if rtts:
+        print(f"Client round trip: median {percentile(rtts,0.5)*1e3:.2f}ms, p99 {percentile(rtts,0.99)*1e3:.2f}ms")
+    print("Results:",results)
+
+if __name__=="__main__":
+    ap = argparse.ArgumentParser(description="Host headless RPG_TEST battles for bot clients.")
+    ap.add_argument("--bots",type=int,default=100,help="stand-in bot clients to run (0 = serve only)")
+    ap.add_argument("--battles",type=int,default=5,help="battles each bot plays in turn")
+    ap.add_argument("--port",type=int,default=PORT)
+    args = ap.parse_args()
+    if args.bots:
+        asyncio.run(main(args.bots,args.battles,0))
+    else:
+        async def serve():
+            host = ArenaHost()
+            server = await asyncio.start_server(host.serve_client,HOST,args.port,backlog=4096)
+            print(f"Arena listening on {HOST}:{args.port}")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                print(host.report())
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,129 @@
+# ------------------------------
+# Battle Log
+# Typed combat events written as JSON lines by a background thread.
+# emit() only checks the fields and puts a dict on a queue; the writer
+# thread serialises and writes in batches (gzip when the path ends in .gz),
+# so the game loop never waits on the disk.
+# Report: python Battle_Log.py battle_log_tactics.jsonl [more logs...]
+# ------------------------------
+
+import atexit
+import gzip
+import json
+import queue
+import sys
+import threading
+import time
+
+# kind -> required fields (every event also gets "t" and "kind")
+EVENTS = {
+    "battle":   ("result",),                        # start / victory / defeat
+    "turn":     ("unit","turn"),
+    "damage":   ("unit","amount","skill","source"), # status damage uses the status as skill
+    "status":   ("unit","status","turns","source"), # applied
+    "tick":     ("unit","status"),                  # a turn started under it
+    "cooldown": ("unit","skill","turns"),
+    "death":    ("unit",),
+}
+
+def open_log(path,mode="rt"):
+    return gzip.open(path,mode) if path.endswith(".gz") else open(path,mode.replace("t",""))
+
+class BattleLog:
+    def __init__(self,path,batch=256,interval=0.5):
+        self.path = path
+        self.batch = batch  # events per write
+        self.interval = interval  # seconds before a partial batch is written
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run,daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def emit(self,kind,**fields):
+        if kind not in EVENTS or set(fields)!=set(EVENTS[kind]):
+            raise ValueError(f"bad {kind!r} event {sorted(fields)} (expected {EVENTS.get(kind)})")
+        fields["kind"] = kind
+        fields["t"] = round(time.time(),3)
+        self.queue.put(fields)
+
+    def _run(self):
+        with open_log(self.path,"at") as f:
+            done = False
+            while not done:
+                lines = []
+                deadline = time.monotonic()+self.interval
+                while len(lines)<self.batch:
+                    try:
+                        event = self.queue.get(timeout=max(0,deadline-time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        done = True
+                        break
+                    lines.append(json.dumps(event,separators=(",",":")))
+                if lines:
+                    f.write("\n".join(lines)+"\n")
+                    f.flush()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+# ------------------------------
+# ANALYZER
+# Streams the logs line by line; memory depends on the number of skills,
+# statuses and units, not on the length of the log.
+# ------------------------------
+def analyze(paths):
+    damage = {}  # skill -> [hits, total, biggest]
+    turn_count,gaps,turn_time,longest = 0,0,0.0,0.0
+    ticks = {}  # status -> turns spent under it
+    battles = {}
+    deaths = 0
+    for path in paths:
+        last_turn = None
+        with open_log(path) as f:
+            for line in f:
+                if not line.strip(): continue
+                e = json.loads(line)
+                kind = e["kind"]
+                if kind=="damage":
+                    d = damage.setdefault(e["skill"],[0,0,0])
+                    d[0] += 1
+                    d[1] += e["amount"]
+                    d[2] = max(d[2],e["amount"])
+                elif kind=="turn":
+                    if last_turn is not None:
+                        gap = e["t"]-last_turn
+                        gaps += 1
+                        turn_time += gap
+                        longest = max(longest,gap)
+                    turn_count += 1
+                    last_turn = e["t"]
+                elif kind=="tick":
+                    ticks[e["status"]] = ticks.get(e["status"],0)+1
+                elif kind=="battle":
+                    battles[e["result"]] = battles.get(e["result"],0)+1
+                    last_turn = None  # time between battles is not a turn
+                elif kind=="death":
+                    deaths += 1
+    return {"damage":damage,"turns":turn_count,"gaps":gaps,"turn_time":turn_time,"longest_turn":longest,
+            "ticks":ticks,"battles":battles,"deaths":deaths}
+
+def print_report(r):
+    print("Battles: "+(", ".join(f"{k} {v}" for k,v in sorted(r["battles"].items())) or "none")+f"; {r['deaths']} deaths")
+    print("Damage per skill:")
+    for skill,(hits,total,biggest) in sorted(r["damage"].items(),key=lambda kv:-kv[1][1]):
+        print(f"  {skill:<10} {total:>7} total  {hits:>6} hits  {total/hits:6.2f} avg  {biggest:>4} max")
+    if r["gaps"]:
+        print(f"Turns: {r['turns']}, {r['turn_time']/r['gaps']:.2f}s average, {r['longest_turn']:.2f}s longest")
+    print("Status uptime (share of turns started under it):")
+    for status,n in sorted(r["ticks"].items(),key=lambda kv:-kv[1]):
+        print(f"  {status:<10} {n/max(1,r['turns']):6.1%}  ({n} turns)")
+
+if __name__=="__main__":
+    if len(sys.argv)<2:
+        print("usage: python Battle_Log.py LOG [LOG...]")
+        sys.exit(1)
+    print_report(analyze(sys.argv[1:]))
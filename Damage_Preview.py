@@ -0,0 +1,76 @@
+# ------------------------------
+# Damage Preview
+# Exact damage distributions for skill previews. A distribution is a dict
+# {damage: probability}; dice are combined by convolution, so a preview is
+# a few small dict products instead of sampling. Status ticks are fixed
+# amounts and just shift the distribution.
+# Previews are memoised in PREVIEW_CACHE; the games key them by
+# (skill, attacker stats, target HP, statuses).
+# Check against sampling: python Damage_Preview.py
+# ------------------------------
+
+from collections import namedtuple
+
+PREVIEW_CACHE = {}
+Preview = namedtuple("Preview","kill expected kill_over_time expected_over_time")
+
+def uniform(lo,hi):
+    # random.randint(lo, hi)
+    p = 1/(hi-lo+1)
+    return {d:p for d in range(lo,hi+1)}
+
+def fixed(n):
+    return {n:1.0}
+
+def shift(dist,n):
+    return {d+n:p for d,p in dist.items()}
+
+def convolve(a,b):
+    # distribution of a sum of independent rolls
+    out = {}
+    for x,p in a.items():
+        for y,q in b.items():
+            out[x+y] = out.get(x+y,0)+p*q
+    return out
+
+def mix(*parts):
+    # (weight, distribution) pairs, weights summing to 1
+    out = {}
+    for w,dist in parts:
+        for d,p in dist.items():
+            out[d] = out.get(d,0)+w*p
+    return out
+
+def expected(dist):
+    return sum(d*p for d,p in dist.items())
+
+def kill_chance(dist,hp):
+    return sum(p for d,p in dist.items() if d>=hp)
+
+def preview(hit,ticks,hp):
+    # hit: distribution of the skill's immediate damage; ticks: status damage still to come
+    total = shift(hit,ticks)
+    return Preview(kill_chance(hit,hp),expected(hit),kill_chance(total,hp),expected(total))
+
+def cached(key,build):
+    if key not in PREVIEW_CACHE:
+        PREVIEW_CACHE[key] = build()
+    return PREVIEW_CACHE[key]
+
+if __name__=="__main__":
+    import random
+    # Simple_RPG regular attack: 1-2 hits of attack+-2, 20% crit for +2
+    attack,hp = 20,40
+    hit = mix((0.8,uniform(attack-2,attack+2)),(0.2,uniform(attack,attack+4)))
+    exact = mix((0.5,hit),(0.5,convolve(hit,hit)))
+    rng = random.Random(1)
+    kills,total,n = 0,0,200000
+    for _ in range(n):
+        dmg = 0
+        for _ in range(rng.randint(1,2)):
+            base = rng.randint(attack-2,attack+2)
+            dmg += base+2 if rng.random()<0.2 else base
+        kills += dmg>=hp
+        total += dmg
+    print(f"exact:   kill {kill_chance(exact,hp):.4f}, mean {expected(exact):.3f}")
+    print(f"sampled: kill {kills/n:.4f}, mean {total/n:.3f} ({n} runs)")
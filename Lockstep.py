@@ -0,0 +1,205 @@
+# ------------------------------
+# Lockstep
+# Two-player co-op link for Simple_RPG. Both games run the same battle
+# from a shared RNG seed; only per-turn commands and a per-turn state
+# hash cross the wire, so traffic does not grow with effects on screen.
+#   hello   'S' seed(4)                          5 bytes, host -> joiner
+#   command 'C' turn(2) action(1) target(1) status(1)   6 bytes
+#   hash    'H' turn(2) crc32(4)                 7 bytes, both ways
+# Protocol self-test with two local processes: python Lockstep.py [--desync]
+# (to test the game itself: python Simple_RPG.py host / python Simple_RPG.py join)
+# ------------------------------
+
+import random
+import socket
+import struct
+import sys
+import time
+import zlib
+
+PORT = 50007
+STATUS_CODES = {None:0,"Burned":1,"Bleeding":2,"Shocked":3,"Frozen":4}
+STATUS_NAMES = {v:k for k,v in STATUS_CODES.items()}
+ACTION_REGULAR = 0
+ACTION_SPECIAL = 1
+PACKETS = {b"C":struct.Struct(">cHBBB"),b"H":struct.Struct(">cHI"),b"S":struct.Struct(">cI")}
+
+def state_hash(units):
+    # crc32 over everything that decides the outcome (not positions or effects)
+    data = b"".join(struct.pack(">hBbb4b",u.hp,STATUS_CODES.get(u.status,0),u.status_duration,u.special_cd,
+                                *(u.status_cd[k] for k in ("Burned","Bleeding","Shocked","Frozen")))
+                    for u in units)
+    return zlib.crc32(data)
+
+class Peer:
+    def __init__(self,role,port=PORT,host="127.0.0.1",seed=None,timeout=30):
+        self.role = role
+        if role=="host":
+            server = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET,socket.SO_REUSEADDR,1)
+            server.bind((host,port))
+            server.listen(1)
+            server.settimeout(timeout)
+            print(f"Waiting for partner on {host}:{port}...")
+            self.sock,_ = server.accept()
+            server.close()
+            self.seed = random.getrandbits(32) if seed is None else seed
+            self.sock.sendall(PACKETS[b"S"].pack(b"S",self.seed))
+        else:
+            deadline = time.time()+timeout
+            while True:
+                try:
+                    self.sock = socket.create_connection((host,port),timeout=timeout)
+                    break
+                except ConnectionRefusedError:
+                    if time.time()>deadline: raise
+                    time.sleep(0.2)
+            hello = self._recv_exact(PACKETS[b"S"].size)
+            self.seed = PACKETS[b"S"].unpack(hello)[1]
+        self.sock.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+        self.sock.setblocking(False)
+        self.buf = b""
+        self.commands = {}  # turn -> (action, target, status)
+        self.local_hashes = {}
+        self.remote_hashes = {}
+        self.desync = None  # first turn whose hashes differed
+        self.closed = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def _recv_exact(self,n):
+        data = b""
+        while len(data)<n:
+            chunk = self.sock.recv(n-len(data))
+            if not chunk: raise ConnectionError("partner closed the connection")
+            data += chunk
+        return data
+
+    def _send(self,packet):
+        self.sock.setblocking(True)
+        self.sock.sendall(packet)
+        self.sock.setblocking(False)
+        self.bytes_sent += len(packet)
+
+    def send_command(self,turn,action,target,status=None):
+        self._send(PACKETS[b"C"].pack(b"C",turn&0xFFFF,action,target,STATUS_CODES[status]))
+
+    def send_hash(self,turn,value):
+        self.local_hashes[turn&0xFFFF] = value
+        self._send(PACKETS[b"H"].pack(b"H",turn&0xFFFF,value))
+        self._check(turn&0xFFFF)
+
+    def poll(self):
+        # Non-blocking: read whatever has arrived and file it by turn
+        while True:
+            try:
+                chunk = self.sock.recv(4096)
+            except (BlockingIOError,InterruptedError):
+                break
+            if not chunk:
+                self.closed = True
+                break
+            self.buf += chunk
+            self.bytes_received += len(chunk)
+        while self.buf:
+            fmt = PACKETS.get(self.buf[:1])
+            if fmt is None: raise ValueError(f"bad packet type {self.buf[:1]!r}")
+            if len(self.buf)<fmt.size: break
+            fields = fmt.unpack(self.buf[:fmt.size])
+            self.buf = self.buf[fmt.size:]
+            if fields[0]==b"C":
+                _,turn,action,target,status = fields
+                self.commands[turn] = (action,target,STATUS_NAMES.get(status))
+            elif fields[0]==b"H":
+                self.remote_hashes[fields[1]] = fields[2]
+                self._check(fields[1])
+
+    def _check(self,turn):
+        if turn in self.local_hashes and turn in self.remote_hashes:
+            if self.local_hashes.pop(turn)!=self.remote_hashes.pop(turn) and self.desync is None:
+                self.desync = turn
+
+    def command(self,turn):
+        return self.commands.pop(turn&0xFFFF,None)
+
+    def close(self):
+        self.sock.close()
+
+# ------------------------------
+# PROTOCOL SELF-TEST
+# Checks the wire protocol only: hello/seed, per-turn commands, hash
+# exchange and desync detection between two processes. The battle is a
+# stand-in with a simplified rule set (no status ticks, Frozen skips or
+# waves); it does not run Simple_RPG's next_turn / send_hash /
+# wait_for_partner path.
+# ------------------------------
+class SimUnit:
+    def __init__(self,name,hp,attack,is_player):
+        self.name,self.hp,self.attack,self.is_player = name,hp,attack,is_player
+        self.status,self.status_duration,self.special_cd = None,0,0
+        self.status_cd = {"Burned":0,"Bleeding":0,"Shocked":0,"Frozen":0}
+
+def simulate(role,port,desync,result):
+    peer = Peer(role,port)
+    rng = random.Random(peer.seed)
+    chooser = random.Random()  # local-only decisions
+    units = [SimUnit("Player",100,20,True),SimUnit("Ally1",80,15,True),
+             SimUnit("Enemy1",80,15,False),SimUnit("Enemy2",80,15,False)]
+    mine = "Player" if role=="host" else "Ally1"
+    turn = 0
+    while any(u.hp>0 for u in units[:2]) and any(u.hp>0 for u in units[2:]) and peer.desync is None and not peer.closed:
+        unit = units[turn%4]
+        turn += 1
+        if desync and role=="join" and turn==6: units[2].hp -= 1
+        peer.send_hash(turn,state_hash(units))
+        if unit.hp<=0: continue
+        foes = [u for u in units if u.is_player!=unit.is_player]
+        if unit.is_player:
+            if unit.name==mine:
+                alive = [i for i,u in enumerate(foes) if u.hp>0]
+                cmd = (ACTION_SPECIAL if unit.special_cd==0 else ACTION_REGULAR,chooser.choice(alive),
+                       chooser.choice(list(STATUS_CODES)))
+                peer.send_command(turn,*cmd)
+            else:
+                cmd = None
+                while cmd is None and peer.desync is None and not peer.closed:
+                    peer.poll()
+                    cmd = peer.command(turn)
+                    if cmd is None: time.sleep(0.001)
+                if cmd is None: break
+            action,target,status = cmd
+            target = foes[target]
+        else:
+            action,status = ACTION_REGULAR,None
+            target = rng.choice([u for u in foes if u.hp>0])
+        if unit.special_cd>0: unit.special_cd -= 1
+        if action==ACTION_SPECIAL:
+            target.hp = max(0,target.hp-unit.attack-5)
+            unit.special_cd = 3
+            if status: target.status,target.status_duration = status,2
+        else:
+            for _ in range(rng.randint(1,2)):
+                dmg = rng.randint(unit.attack-2,unit.attack+2)
+                target.hp = max(0,target.hp-(dmg+2 if rng.random()<0.2 else dmg))
+    # let the partner's final hashes arrive
+    deadline = time.time()+1
+    while peer.local_hashes and peer.desync is None and not peer.closed and time.time()<deadline:
+        peer.poll()
+        time.sleep(0.01)
+    result.put((role,turn,[u.hp for u in units],peer.desync,peer.bytes_sent))
+    peer.close()
+
+if __name__=="__main__":
+    import multiprocessing
+    desync = "--desync" in sys.argv
+    port = PORT+random.randrange(1000)
+    result = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=simulate,args=(role,port,desync,result)) for role in ("host","join")]
+    for p in procs: p.start()
+    reports = [result.get(timeout=60) for _ in procs]
+    for p in procs: p.join()
+    print("Protocol check only (simplified rules, not Simple_RPG's turn loop).")
+    for role,turns,hps,bad,sent in sorted(reports):
+        per_turn = sent/turns if turns else 0
+        print(f"{role}: {turns} turns, final HP {hps}, sent {sent} bytes ({per_turn:.1f}/turn), "
+              + (f"DESYNC at turn {bad}" if bad else "in sync"))
@@ -0,0 +1,233 @@
+# ------------------------------
+# Overworld Path
+# Hierarchical (HPA*) pathfinding for click-to-travel on big overworlds.
+# The map is cut into chunks; each open stretch of a chunk border becomes
+# an entrance, and paths between the entrances of one chunk are found once
+# and cached. A query only searches inside the start/goal chunks plus the
+# small entrance graph, then stitches the cached pieces together.
+# Moves are 4-way, like move_player.
+# Benchmark: python Overworld_Path.py [size]
+# ------------------------------
+
+import heapq
+import threading
+from collections import deque
+
+STEPS = ((1,0),(-1,0),(0,1),(0,-1))
+GOAL = (-1,-1)  # stands for the query goal inside the entrance graph
+
+class HierarchicalPathfinder:
+    def __init__(self,width,height,passable,chunk=8):
+        self.width = width
+        self.height = height
+        self.passable = passable  # passable(x, y) -> bool
+        self.chunk = chunk
+        self.chunks_x = (width+chunk-1)//chunk
+        self.chunks_y = (height+chunk-1)//chunk
+        self.borders = {}  # (chunk, "E"/"N") -> [(tile inside, tile across)]
+        self.links = {}  # entrance -> set of entrances across a border
+        self.intra = {}  # chunk -> {entrance: {entrance: (cost, path)}}
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    # --- chunks ---
+    def chunk_of(self,x,y):
+        return (x//self.chunk,y//self.chunk)
+
+    def bounds(self,c):
+        x0,y0 = c[0]*self.chunk,c[1]*self.chunk
+        return x0,y0,min(self.width,x0+self.chunk),min(self.height,y0+self.chunk)
+
+    def entrances(self,c):
+        found = set()
+        for key in ((c,"E"),(c,"N"),((c[0]-1,c[1]),"E"),((c[0],c[1]-1),"N")):
+            for a,b in self.borders.get(key,()):
+                found.add(a if self.chunk_of(*a)==c else b)
+        return found
+
+    def scan_border(self,c,side):
+        # One entrance pair in the middle of every open run along the border
+        x0,y0,x1,y1 = self.bounds(c)
+        if side=="E":
+            if x1>=self.width: return []
+            cells = [((x1-1,y),(x1,y)) for y in range(y0,y1)]
+        else:
+            if y1>=self.height: return []
+            cells = [((x,y1-1),(x,y1)) for x in range(x0,x1)]
+        pairs,run = [],[]
+        for a,b in cells+[(None,None)]:
+            if a and self.passable(*a) and self.passable(*b):
+                run.append((a,b))
+            elif run:
+                pairs.append(run[len(run)//2])
+                run = []
+        return pairs
+
+    def local_search(self,start,c,goals=None):
+        # BFS confined to chunk c; returns parent map
+        x0,y0,x1,y1 = self.bounds(c)
+        parents = {start:None}
+        queue = deque([start])
+        remaining = set(goals) if goals is not None else None
+        while queue:
+            cur = queue.popleft()
+            if remaining is not None:
+                remaining.discard(cur)
+                if not remaining: break
+            for dx,dy in STEPS:
+                nxt = (cur[0]+dx,cur[1]+dy)
+                if nxt in parents: continue
+                if not (x0<=nxt[0]<x1 and y0<=nxt[1]<y1) or not self.passable(*nxt): continue
+                parents[nxt] = cur
+                queue.append(nxt)
+        return parents
+
+    @staticmethod
+    def trace(parents,end):
+        # path from the search start (excluded) to end (included)
+        path = []
+        while parents[end] is not None:
+            path.append(end)
+            end = parents[end]
+        path.reverse()
+        return path
+
+    def connect_chunk(self,c):
+        nodes = self.entrances(c)
+        table = {}
+        for a in nodes:
+            parents = self.local_search(a,c,nodes)
+            table[a] = {b:(len(p),p) for b in nodes if b!=a and b in parents for p in [self.trace(parents,b)]}
+        self.intra[c] = table
+
+    def set_border(self,key,pairs):
+        for a,b in self.borders.get(key,()):
+            self.links[a].discard(b)
+            self.links[b].discard(a)
+        self.borders[key] = pairs
+        for a,b in pairs:
+            self.links.setdefault(a,set()).add(b)
+            self.links.setdefault(b,set()).add(a)
+
+    # --- building / invalidation ---
+    def build(self):
+        with self.lock:
+            for cy in range(self.chunks_y):
+                for cx in range(self.chunks_x):
+                    for side in ("E","N"):
+                        self.set_border(((cx,cy),side),self.scan_border((cx,cy),side))
+            for cy in range(self.chunks_y):
+                for cx in range(self.chunks_x):
+                    self.connect_chunk((cx,cy))
+        self.ready.set()
+
+    def build_async(self):
+        self.ready.clear()
+        threading.Thread(target=self.build,daemon=True).start()
+
+    def invalidate(self,x,y):
+        # Call after the tile at (x, y) changes; only its chunk and neighbours are redone
+        c = self.chunk_of(x,y)
+        with self.lock:
+            for key in ((c,"E"),(c,"N"),((c[0]-1,c[1]),"E"),((c[0],c[1]-1),"N")):
+                if key in self.borders:
+                    self.set_border(key,self.scan_border(*key))
+            for n in (c,(c[0]+1,c[1]),(c[0]-1,c[1]),(c[0],c[1]+1),(c[0],c[1]-1)):
+                if n in self.intra:
+                    self.connect_chunk(n)
+
+    # --- queries ---
+    def find_path(self,start,goal):
+        # List of tiles from start (excluded) to goal, or None
+        start,goal = tuple(start),tuple(goal)
+        if not self.ready.is_set() or not (0<=goal[0]<self.width and 0<=goal[1]<self.height):
+            return None
+        if start==goal: return []
+        if not self.passable(*goal): return None
+        with self.lock:
+            sc,gc = self.chunk_of(*start),self.chunk_of(*goal)
+            if sc==gc:
+                parents = self.local_search(start,sc,[goal])
+                if goal in parents:
+                    return self.trace(parents,goal)
+            from_start = self.local_search(start,sc,self.entrances(sc))
+            to_goal = self.local_search(goal,gc,self.entrances(gc))
+            exits = {n:self.trace(to_goal,n) for n in self.entrances(gc) if n in to_goal}
+            if not exits: return None
+            # A* over entrances; GOAL is reached through a cached exit path
+            h = lambda n: 0 if n==GOAL else abs(n[0]-goal[0])+abs(n[1]-goal[1])
+            best = {}
+            came = {}
+            heap = []
+            for n in self.entrances(sc):
+                if n in from_start:
+                    cost = len(self.trace(from_start,n))
+                    best[n] = cost
+                    came[n] = None
+                    heapq.heappush(heap,(cost+h(n),cost,n))
+            while heap:
+                _,cost,node = heapq.heappop(heap)
+                if node==GOAL: break
+                if cost>best.get(node,1<<30): continue
+                steps = [(m,c) for m,(c,_) in self.intra.get(self.chunk_of(*node),{}).get(node,{}).items()]
+                steps += [(m,1) for m in self.links.get(node,())]
+                if node in exits:
+                    steps.append((GOAL,len(exits[node])))
+                for m,c in steps:
+                    nc = cost+c
+                    if nc<best.get(m,1<<30):
+                        best[m] = nc
+                        came[m] = node
+                        heapq.heappush(heap,(nc+h(m),nc,m))
+            if GOAL not in came: return None
+            chain = []
+            node = GOAL
+            while node is not None:
+                chain.append(node)
+                node = came[node]
+            chain.reverse()
+            path = self.trace(from_start,chain[0])
+            for a,b in zip(chain,chain[1:]):
+                if b==GOAL:
+                    if a!=goal:
+                        path += list(reversed(exits[a]))[1:]+[goal]
+                elif b in self.links.get(a,()):
+                    path.append(b)
+                else:
+                    path += self.intra[self.chunk_of(*a)][a][b][1]
+            return path
+
+# ------------------------------
+# BENCHMARK
+# ------------------------------
+if __name__=="__main__":
+    import random
+    import sys
+    import time
+    size = int(sys.argv[1]) if len(sys.argv)>1 else 512
+    rng = random.Random(1)
+    grid = [[rng.random()<0.25 for _ in range(size)] for _ in range(size)]  # True = mountain
+    passable = lambda x,y: not grid[y][x]
+    finder = HierarchicalPathfinder(size,size,passable,chunk=16)
+    t0 = time.perf_counter()
+    finder.build()
+    print(f"{size}x{size} map: abstract graph built in {time.perf_counter()-t0:.2f}s")
+    open_tiles = [(x,y) for y in range(size) for x in range(size) if passable(x,y)]
+    times,found = [],0
+    for _ in range(50):
+        a,b = rng.choice(open_tiles),rng.choice(open_tiles)
+        t0 = time.perf_counter()
+        path = finder.find_path(a,b)
+        times.append(time.perf_counter()-t0)
+        if path:
+            found += 1
+            cur = a
+            for step in path:
+                assert abs(step[0]-cur[0])+abs(step[1]-cur[1])==1 and passable(*step)
+                cur = step
+            assert cur==b
+    times.sort()
+    print(f"50 queries: {found} paths, median {times[25]*1e3:.1f}ms, worst {times[-1]*1e3:.1f}ms")
+    t0 = time.perf_counter()
+    finder.invalidate(size//2,size//2)
+    print(f"chunk invalidation: {(time.perf_counter()-t0)*1e3:.1f}ms")
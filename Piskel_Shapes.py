@@ -0,0 +1,195 @@
+# ------------------------------
+# Piskel Shapes
+# Turns .piskel frames into turtle compound shapes so sprites can be
+# scaled with shapesize() like the built-in polygon shapes.
+# Same-coloured pixels are merged into as few rectangles as possible
+# (row runs, grown downwards greedily) and the rectangles are cached
+# in SHAPE_CACHE so each file is only decoded once.
+# Run: python Piskel_Shapes.py Characters/Kirby/Kirby-20250924-102429.piskel
+# ------------------------------
+
+import base64
+import glob
+import json
+import os
+import struct
+import sys
+import zlib
+
+SHAPE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".shape_cache")
+ALPHA_CUTOFF = 128  # pixels more transparent than this are left out
+
+# ------------------------------
+# PNG DECODING (8-bit RGBA / RGB / palette, non-interlaced)
+# ------------------------------
+def paeth(a,b,c):
+    p = a+b-c
+    pa,pb,pc = abs(p-a),abs(p-b),abs(p-c)
+    if pa<=pb and pa<=pc: return a
+    return b if pb<=pc else c
+
+def decode_png(data):
+    if data[:8]!=b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG image")
+    pos = 8
+    idat = b""
+    palette,trns = None,None
+    while pos<len(data):
+        length, = struct.unpack(">I",data[pos:pos+4])
+        kind = data[pos+4:pos+8]
+        body = data[pos+8:pos+8+length]
+        pos += 12+length
+        if kind==b"IHDR":
+            width,height,depth,ctype,_,_,interlace = struct.unpack(">IIBBBBB",body)
+        elif kind==b"PLTE":
+            palette = [tuple(body[i:i+3]) for i in range(0,len(body),3)]
+        elif kind==b"tRNS":
+            trns = body
+        elif kind==b"IDAT":
+            idat += body
+        elif kind==b"IEND":
+            break  # ignore anything trailing the image
+    if depth!=8 or interlace or ctype not in (2,3,6):
+        raise ValueError(f"unsupported PNG (depth {depth}, colour type {ctype}, interlace {interlace})")
+    bpp = {2:3,3:1,6:4}[ctype]
+    stride = width*bpp
+    raw = zlib.decompress(idat)
+    prev = bytearray(stride)
+    rows = []
+    for y in range(height):
+        ftype = raw[y*(stride+1)]
+        line = bytearray(raw[y*(stride+1)+1:(y+1)*(stride+1)])
+        for i in range(stride):
+            a = line[i-bpp] if i>=bpp else 0
+            c = prev[i-bpp] if i>=bpp else 0
+            if ftype==1: line[i] = (line[i]+a)&255
+            elif ftype==2: line[i] = (line[i]+prev[i])&255
+            elif ftype==3: line[i] = (line[i]+(a+prev[i])//2)&255
+            elif ftype==4: line[i] = (line[i]+paeth(a,prev[i],c))&255
+        rows.append(line)
+        prev = line
+    pixels = []
+    for line in rows:
+        row = []
+        for x in range(width):
+            if ctype==6:
+                row.append(tuple(line[x*4:x*4+4]))
+            elif ctype==2:
+                row.append(tuple(line[x*3:x*3+3])+(255,))
+            else:
+                i = line[x]
+                alpha = trns[i] if trns and i<len(trns) else 255
+                row.append(palette[i]+(alpha,))
+        pixels.append(row)
+    return width,height,pixels
+
+# ------------------------------
+# PISKEL FRAMES
+# ------------------------------
+def load_frames(path):
+    # Returns (width, height, frames); each frame is rows of "#rrggbb" or None,
+    # top row first, with all layers composited.
+    with open(path) as f:
+        piskel = json.load(f)["piskel"]
+    w,h = piskel["width"],piskel["height"]
+    frames = None
+    for layer_json in piskel["layers"]:
+        layer = json.loads(layer_json)
+        opacity = layer.get("opacity",1)
+        if frames is None:
+            frames = [[[None]*w for _ in range(h)] for _ in range(layer["frameCount"])]
+        for chunk in layer["chunks"]:
+            png = base64.b64decode(chunk["base64PNG"].split(",",1)[1])
+            _,_,sheet = decode_png(png)
+            for col,indexes in enumerate(chunk["layout"]):
+                for row,index in enumerate(indexes):
+                    frame = frames[index]
+                    for y in range(h):
+                        src = sheet[row*h+y]
+                        for x in range(w):
+                            r,g,b,a = src[col*w+x]
+                            if a*opacity>=ALPHA_CUTOFF:
+                                frame[y][x] = f"#{r:02x}{g:02x}{b:02x}"
+    return w,h,frames
+
+# ------------------------------
+# RECTANGLE MERGING
+# ------------------------------
+def merge_rects(frame):
+    # Greedy cover: take the longest same-colour run from the first free pixel,
+    # then grow it down while the whole run below matches. Returns (x, y, w, h, colour).
+    height = len(frame)
+    width = len(frame[0]) if height else 0
+    used = [[False]*width for _ in range(height)]
+    rects = []
+    for y in range(height):
+        for x in range(width):
+            color = frame[y][x]
+            if color is None or used[y][x]: continue
+            w = 1
+            while x+w<width and frame[y][x+w]==color and not used[y][x+w]:
+                w += 1
+            h = 1
+            while y+h<height and all(frame[y+h][i]==color and not used[y+h][i] for i in range(x,x+w)):
+                h += 1
+            for yy in range(y,y+h):
+                for xx in range(x,x+w):
+                    used[yy][xx] = True
+            rects.append((x,y,w,h,color))
+    return rects
+
+def cache_path(path):
+    st = os.stat(path)
+    name = os.path.basename(path).replace(".piskel","")
+    return os.path.join(SHAPE_CACHE,f"{name}-{st.st_size}-{int(st.st_mtime)}.json")
+
+def piskel_rects(path):
+    # Returns (width, height, [rects per frame]), using the on-disk cache when fresh
+    cached = cache_path(path)
+    if os.path.exists(cached):
+        with open(cached) as f:
+            data = json.load(f)
+    else:
+        w,h,frames = load_frames(path)
+        data = {"width":w,"height":h,"frames":[merge_rects(fr) for fr in frames]}
+        os.makedirs(SHAPE_CACHE,exist_ok=True)
+        with open(cached,"w") as f:
+            json.dump(data,f,separators=(",",":"))
+    return data["width"],data["height"],[[tuple(r) for r in fr] for fr in data["frames"]]
+
+# ------------------------------
+# TURTLE SHAPES
+# ------------------------------
+def piskel_shape(path,frame=0):
+    # One shape unit per source pixel, centred on the turtle; scale it with
+    # shapesize(). Turtle maps shape point (a, b) to screen offset (b, -a) at
+    # heading 0, hence the swapped coordinates below.
+    import turtle
+    w,h,frames = piskel_rects(path)
+    shape = turtle.Shape("compound")
+    for x,y,rw,rh,color in frames[frame]:
+        left,top = x-w/2,h/2-y
+        right,bottom = left+rw,top-rh
+        shape.addcomponent(((-top,left),(-top,right),(-bottom,right),(-bottom,left)),color,color)
+    return shape
+
+def register_piskel(screen,name,path,frame=0):
+    screen.register_shape(name,piskel_shape(path,frame))
+    return name
+
+def sprite_stretch(path,size):
+    # shapesize() factor that fits the sprite into a size x size pixel box
+    w,h,_ = piskel_rects(path)
+    return size/max(w,h)
+
+def find_piskel(folder,name):
+    # Characters/<name>/<name>-<timestamp>.piskel, newest first
+    matches = sorted(glob.glob(os.path.join(folder,"**",f"{name}-*.piskel"),recursive=True),reverse=True)
+    return matches[0] if matches else None
+
+if __name__=="__main__":
+    for path in sys.argv[1:]:
+        w,h,frames = piskel_rects(path)
+        pixels = [sum(r[2]*r[3] for r in fr) for fr in frames]
+        rects = [len(fr) for fr in frames]
+        print(f"{path}: {w}x{h}, {len(frames)} frames, {sum(pixels)} pixels -> {sum(rects)} rectangles")
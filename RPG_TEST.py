@@ -8,6 +8,12 @@ import turtle
 import random
 import time
 import os
+from collections import deque
+from Render_Backends import make_renderer, Layer
+from Battle_Log import BattleLog
+from Damage_Preview import cached, preview, uniform
+from Overworld_Path import HierarchicalPathfinder
+from Piskel_Shapes import find_piskel, register_piskel, sprite_stretch
 
 # ------------------------------
 # SETTINGS
@@ -17,6 +23,28 @@ CELL_SIZE = 100
 ANIMATION_SPEED = 0.05
 MAP_SIZE = 10
 OVERWORLD_CELL = 60
+RENDER_BACKEND = "canvas"  # "turtle", "canvas" or "null"
+ENCOUNTER_RATE = 0.15  # chance per step on grass
+FOV_RADIUS = 4
+OVERWORLD_CHUNK = 8  # pathfinding chunk size, in tiles
+BATTLE_ROCKS = 3  # obstacles placed on the grid per encounter
+INPUT_QUEUE_SIZE = 32
+FRAME_MS = 33  # input is handled once per frame
+USE_SPRITES = True  # draw units with their piskel art instead of circles
+SPRITE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Characters")
+BATTLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "battle_log_tactics.jsonl")  # .gz to compress, None for no log
+UNIT_SPRITES = {"Player":"Kirby","Hero":"Hunter","Mage":"Vannessa","Cleric":"Frieda",
+                "Slime":"Generic_Ghost","Goblin":"Dexter"}
+
+# ------------------------------
+# BATTLE LOG
+# Combat events go to a JSONL file, written off the Tk thread.
+# ------------------------------
+battle_log = BattleLog(BATTLE_LOG) if BATTLE_LOG else None
+battle_turn = 0
+
+def log_event(kind,**fields):
+    if battle_log: battle_log.emit(kind,**fields)
 
 # ------------------------------
 # SCREEN SETUP
@@ -25,6 +53,7 @@ screen = turtle.Screen()
 screen.title("Tactical RPG – Overworld & Battle")
 screen.bgcolor("lightblue")
 screen.setup(width=1200, height=900)
+renderer = make_renderer(RENDER_BACKEND, screen, FRAME_MS)
 
 # ------------------------------
 # GLOBAL VARIABLES
@@ -42,9 +71,10 @@ player_pos = [0, 0]  # Overworld coordinates
 save_file = "save.txt"
 
 # ------------------------------
-# TURTLE OBJECTS
+# SCENES
+# Overworld and battle grid are built once as layers and
+# switched by showing/hiding them (see enter_battle/leave_battle).
 # ------------------------------
-# Draw overworld map
 overworld_map = []
 for y in range(MAP_SIZE):
     row=[]
@@ -52,32 +82,153 @@ for y in range(MAP_SIZE):
         # Simple terrain assignment
         terrain=random.choice(["green","green","green","blue","gray"])
         row.append(terrain)
-        drawer.goto(-MAP_SIZE*OVERWORLD_CELL//2 + x*OVERWORLD_CELL,
-                    -MAP_SIZE*OVERWORLD_CELL//2 + y*OVERWORLD_CELL)
-        drawer.fillcolor(terrain)
-        drawer.begin_fill()
-        for _ in range(4):
-            drawer.forward(OVERWORLD_CELL)
-            drawer.left(90)
-        drawer.end_fill()
     overworld_map.append(row)
 
+# Click-to-travel paths; the chunk graph is built off the Tk thread
+pathfinder = HierarchicalPathfinder(MAP_SIZE, MAP_SIZE, lambda x,y: overworld_map[y][x]!="gray", OVERWORLD_CHUNK)
+pathfinder.build_async()
+travel_path = deque()
+
+overworld_layer = Layer(renderer)
+battle_layer = Layer(renderer, visible=False)
+battle_tiles = {}  # (x,y) -> grid tile item
+range_items = {}  # (x,y) -> movement overlay item, hidden until in range
+
+def build_scenes():
+    # Overworld tiles are added lazily as they are explored (see update_fov)
+    screen.tracer(0)
+    for y in range(GRID_SIZE):
+        for x in range(GRID_SIZE):
+            battle_tiles[(x,y)] = battle_layer.add(renderer.rect(-GRID_SIZE*CELL_SIZE//2 + x*CELL_SIZE,
+                                                                 -GRID_SIZE*CELL_SIZE//2 + y*CELL_SIZE,
+                                                                 CELL_SIZE, CELL_SIZE, "palegreen", "darkgreen"))
+    for (x,y) in battle_tiles:
+        item = renderer.rect(-GRID_SIZE*CELL_SIZE//2 + x*CELL_SIZE + 4, -GRID_SIZE*CELL_SIZE//2 + y*CELL_SIZE + 4,
+                             CELL_SIZE-8, CELL_SIZE-8, "yellow")
+        renderer.hide(item)
+        renderer.to_back(item)
+        range_items[(x,y)] = item
+    battle_layer.to_back()
+    screen.update()
+    screen.tracer(1)
+
+build_scenes()
+
+# ------------------------------
+# FIELD OF VIEW / FOG OF WAR
+# Recursive shadowcasting; mountains block sight, water does not.
+# Only visible or explored tiles get a canvas item.
+# ------------------------------
+FOG_COLORS = {"green":"darkolivegreen","blue":"navy","gray":"dimgray"}
+OCTANTS = [(1,0,0,1),(0,1,1,0),(0,-1,1,0),(-1,0,0,1),(-1,0,0,-1),(0,-1,-1,0),(0,1,-1,0),(1,0,0,-1)]
+fov_cache = {}  # (x,y) -> (set of visible tiles, bitmask)
+overworld_tiles = {}  # (x,y) -> renderer item
+visible_tiles = frozenset()
+explored_bits = 0  # bit y*MAP_SIZE+x set once a tile has been seen
+
+def blocks_sight(x,y):
+    return not (0<=x<MAP_SIZE and 0<=y<MAP_SIZE) or overworld_map[y][x]=="gray"
+
+def cast_light(cx,cy,row,start,end,xx,xy,yx,yy,seen):
+    if start<end: return
+    new_start=start
+    for j in range(row,FOV_RADIUS+1):
+        blocked=False
+        dy=-j
+        for dx in range(-j,1):
+            l_slope=(dx-0.5)/(dy+0.5)
+            r_slope=(dx+0.5)/(dy-0.5)
+            if start<r_slope: continue
+            if end>l_slope: break
+            x=cx+dx*xx+dy*xy
+            y=cy+dx*yx+dy*yy
+            if dx*dx+dy*dy<=FOV_RADIUS*FOV_RADIUS and 0<=x<MAP_SIZE and 0<=y<MAP_SIZE:
+                seen.add((x,y))
+            if blocked:
+                if blocks_sight(x,y):
+                    new_start=r_slope
+                else:
+                    blocked=False
+                    start=new_start
+            elif blocks_sight(x,y) and j<FOV_RADIUS:
+                blocked=True
+                cast_light(cx,cy,j+1,start,l_slope,xx,xy,yx,yy,seen)
+                new_start=r_slope
+        if blocked: break
+
+def field_of_view(px,py):
+    if (px,py) not in fov_cache:
+        seen={(px,py)}
+        for xx,xy,yx,yy in OCTANTS:
+            cast_light(px,py,1,1.0,0.0,xx,xy,yx,yy,seen)
+        mask=0
+        for x,y in seen:
+            mask|=1<<(y*MAP_SIZE+x)
+        fov_cache[(px,py)]=(frozenset(seen),mask)
+    return fov_cache[(px,py)]
+
+def tile_item(x,y,color):
+    item=overworld_tiles.get((x,y))
+    if item is None:
+        item=overworld_layer.add(renderer.rect(-MAP_SIZE*OVERWORLD_CELL//2 + x*OVERWORLD_CELL,
+                                               -MAP_SIZE*OVERWORLD_CELL//2 + y*OVERWORLD_CELL,
+                                               OVERWORLD_CELL, OVERWORLD_CELL, color, "black"))
+        renderer.to_back(item)
+        overworld_tiles[(x,y)]=item
+    else:
+        renderer.recolor(item,color)
+    return item
+
+def update_fov():
+    # Only tiles entering or leaving view are touched
+    global visible_tiles, explored_bits
+    seen,mask=field_of_view(player_pos[0],player_pos[1])
+    for x,y in visible_tiles-seen:
+        tile_item(x,y,FOG_COLORS[overworld_map[y][x]])
+    for x,y in seen-visible_tiles:
+        tile_item(x,y,overworld_map[y][x])
+    visible_tiles=seen
+    explored_bits|=mask
+
+def reveal_explored():
+    # Draw fogged tiles for everything explored in a loaded save
+    for i in range(MAP_SIZE*MAP_SIZE):
+        if explored_bits>>i&1:
+            x,y=i%MAP_SIZE,i//MAP_SIZE
+            if (x,y) not in visible_tiles:
+                tile_item(x,y,FOG_COLORS[overworld_map[y][x]])
+
+# ------------------------------
+# SPRITES
+# ------------------------------
+def set_sprite(t,name,size,fallback="circle"):
+    # Compound shapes scale with shapesize(), so one registration serves every size
+    art=UNIT_SPRITES.get(name)
+    path=find_piskel(SPRITE_FOLDER,art) if USE_SPRITES and art else None
+    if not path:
+        t.shape(fallback)
+        t.shapesize(1,1)
+        return
+    if art not in screen.getshapes():
+        register_piskel(screen,art,path)
+    t.shape(art)
+    stretch=sprite_stretch(path,size)
+    t.shapesize(stretch,stretch,0)
+
+# ------------------------------
+# TURTLE OBJECTS
+# ------------------------------
 # Player turtle
 player = turtle.Turtle()
-player.shape("circle")
 player.color("yellow")
+set_sprite(player,"Player",OVERWORLD_CELL*0.8)
 player.penup()
-player.goto(-MAP_SIZE*OVERWORLD_CELL//2 + player_pos[0]*OVERWORLD_CELL + OVERWORLD_CELL//2,
-            -MAP_SIZE*OVERWORLD_CELL//2 + player_pos[1]*OVERWORLD_CELL + OVERWORLD_CELL//2)
 
-drawer = turtle.Turtle()
-drawer.hideturtle()
-drawer.speed(0)
-drawer.penup()
+def place_player():
+    player.goto(-MAP_SIZE*OVERWORLD_CELL//2 + player_pos[0]*OVERWORLD_CELL + OVERWORLD_CELL//2,
+                -MAP_SIZE*OVERWORLD_CELL//2 + player_pos[1]*OVERWORLD_CELL + OVERWORLD_CELL//2)
 
-effect = turtle.Turtle()
-effect.hideturtle()
-effect.penup()
+place_player()
 
 highlighter = turtle.Turtle()
 highlighter.hideturtle()
@@ -95,24 +246,26 @@ turn_display.hideturtle()
 turn_display.penup()
 turn_display.goto(0, 300)
 
-highlighted_squares = []
+highlighted_squares = frozenset()
 
 # ------------------------------
 # CHARACTER CLASS
 # ------------------------------
 class Character:
-    def __init__(self,name,x,y,color,hp=25):
+    def __init__(self,name,x,y,color,hp=25,move=2):
         self.name = name
         self.x = x
         self.y = y
         self.color = color
         self.hp = hp
         self.max_hp = hp
+        self.move = move  # movement points per turn
+        self.moves_left = move
         self.level = 1
         self.xp = 0
         self.turtle = turtle.Turtle()
-        self.turtle.shape("circle")
         self.turtle.color(color)
+        set_sprite(self.turtle,name,CELL_SIZE*0.7)
         self.turtle.penup()
         self.hp_bar = turtle.Turtle()
         self.hp_bar.hideturtle()
@@ -126,6 +279,21 @@ class Character:
         self.update_hp_bar()
         self.update_status_label()
 
+    def reset(self,name,x,y,color,hp):
+        # Reuse this unit (and its turtles) for a freshly spawned enemy
+        self.name = name
+        self.x = x
+        self.y = y
+        self.color = color
+        self.hp = hp
+        self.max_hp = hp
+        self.moves_left = self.move
+        self.status_effects.clear()
+        for k in self.cooldowns: self.cooldowns[k]=0
+        self.turtle.color(color)
+        set_sprite(self.turtle,name,CELL_SIZE*0.7)
+        self.update_position()
+
     def update_position(self):
         if battle_mode:
             screen_x = -GRID_SIZE*CELL_SIZE//2 + self.x*CELL_SIZE + CELL_SIZE//2
@@ -166,6 +334,7 @@ class Character:
             time.sleep(ANIMATION_SPEED)
         self.x = target_x
         self.y = target_y
+        invalidate_ranges()
         self.update_position()
 
     def apply_status_start_turn(self):
@@ -174,13 +343,16 @@ class Character:
         if "Freezing" in self.status_effects:
             stunned=True
             del self.status_effects["Freezing"]
+            log_event("tick",unit=self.name,status="Freezing")
         for k in list(self.status_effects.keys()):
             self.status_effects[k]-=1
+            log_event("tick",unit=self.name,status=k)
+            if k in DOT_DAMAGE:
+                self.hp-=DOT_DAMAGE[k]
+                log_event("damage",unit=self.name,amount=DOT_DAMAGE[k],skill=k,source=self.name)
             if k=="Shock":
-                self.hp-=2
                 show_effect(self.x,self.y,"yellow",28)
             elif k=="Burn":
-                self.hp-=1
                 show_effect(self.x,self.y,"red",24)
             elif k=="Regen":
                 self.hp=min(self.max_hp,self.hp+2)
@@ -198,6 +370,19 @@ class Character:
         self.update_status_label()
         return stunned
 
+    def hit(self,target,skill):
+        dmg=random.randint(*SKILL_DICE[skill])
+        target.hp-=dmg
+        log_event("damage",unit=target.name,amount=dmg,skill=skill,source=self.name)
+
+    def inflict(self,target,status,turns):
+        target.status_effects[status]=turns
+        log_event("status",unit=target.name,status=status,turns=turns,source=self.name)
+
+    def set_cooldown(self,skill,turns):
+        self.cooldowns[skill]=turns
+        log_event("cooldown",unit=self.name,skill=skill,turns=turns)
+
     def attack(self,target,skill="basic"):
         if skill in self.cooldowns and self.cooldowns[skill]>0:
             print(f"{skill} cooldown {self.cooldowns[skill]}")
@@ -205,51 +390,48 @@ class Character:
         used=False
         if skill=="basic" and target:
             if abs(self.x-target.x)<=1 and abs(self.y-target.y)<=1:
-                target.hp-=random.randint(2,4)
+                self.hit(target,"basic")
                 show_effect(target.x,target.y,"orange",28)
                 used=True
         elif skill=="strong" and target:
             if abs(self.x-target.x)<=1 and abs(self.y-target.y)<=1:
-                target.hp-=random.randint(4,6)
+                self.hit(target,"strong")
                 show_effect(target.x,target.y,"red",36)
-                self.cooldowns["strong"]=3
+                self.set_cooldown("strong",3)
                 used=True
         elif skill=="fireball" and target:
-            print(f"{self.name} casts Fireball!")
             for e in enemies:
                 if abs(e.x-target.x)<=1 and abs(e.y-target.y)<=1:
-                    e.hp-=random.randint(3,5)
-                    e.status_effects["Burn"]=2
+                    self.hit(e,"fireball")
+                    self.inflict(e,"Burn",2)
                     show_effect(e.x,e.y,"purple",40)
                     e.update_hp_bar()
-            self.cooldowns["fireball"]=3
+            self.set_cooldown("fireball",3)
             used=True
         elif skill=="lightning" and target:
-            print(f"{self.name} casts Lightning!")
             for e in enemies:
                 if abs(e.x-target.x)<=1 and abs(e.y-target.y)<=1:
-                    e.hp-=random.randint(4,6)
-                    e.status_effects["Shock"]=2
-                    if random.random()<0.3: e.status_effects["Stun"]=1
+                    self.hit(e,"lightning")
+                    self.inflict(e,"Shock",2)
+                    if random.random()<0.3: self.inflict(e,"Stun",1)
                     show_effect(e.x,e.y,"yellow",44)
                     e.update_hp_bar()
-            self.cooldowns["lightning"]=4
+            self.set_cooldown("lightning",4)
             used=True
         elif skill=="heal":
             self.hp=min(self.max_hp,self.hp+random.randint(5,8))
-            self.status_effects["Regen"]=2
+            self.inflict(self,"Regen",2)
             show_effect(self.x,self.y,"green",40)
-            self.cooldowns["heal"]=3
+            self.set_cooldown("heal",3)
             used=True
         elif skill=="ice" and target:
-            print(f"{self.name} casts Ice Blast!")
             for e in enemies:
                 if abs(e.x-target.x)<=1 and abs(e.y-target.y)<=1:
-                    e.hp-=random.randint(3,5)
-                    e.status_effects["Freezing"]=1
+                    self.hit(e,"ice")
+                    self.inflict(e,"Freezing",1)
                     show_effect(e.x,e.y,"cyan",40)
                     e.update_hp_bar()
-            self.cooldowns["ice"]=4
+            self.set_cooldown("ice",4)
             used=True
         if used:
             self.update_hp_bar()
@@ -261,32 +443,143 @@ class Character:
             if self.cooldowns[k]>0:
                 self.cooldowns[k]-=1
 
+# ------------------------------
+# DAMAGE PREVIEW
+# Hovering a tile shows, for every enemy the selected skill would hit, the
+# exact chance to kill now / once its status ticks run out, and the mean.
+# ------------------------------
+SKILL_DICE = {"basic":(2,4),"strong":(4,6),"fireball":(3,5),"lightning":(4,6),"ice":(3,5)}
+AREA_SKILLS = ("fireball","lightning","ice")
+SKILL_STATUS = {"fireball":("Burn",2),"lightning":("Shock",2)}
+DOT_DAMAGE = {"Burn":1,"Shock":2}  # per turn
+preview_items = []
+
+def skill_preview(skill,target):
+    statuses=tuple(sorted(target.status_effects.items()))
+    def build():
+        effects=dict(statuses)
+        if skill in SKILL_STATUS:
+            k,turns=SKILL_STATUS[skill]
+            effects[k]=turns
+        ticks=sum(DOT_DAMAGE.get(k,0)*turns for k,turns in effects.items())
+        return preview(uniform(*SKILL_DICE[skill]),ticks,target.hp)
+    return cached((skill,target.hp,statuses),build)
+
+def preview_text(p):
+    txt=f"{p.kill:.0%} kill, avg {p.expected:.1f}"
+    if p.expected_over_time!=p.expected:
+        txt+=f" ({p.kill_over_time:.0%} after ticks)"
+    return txt
+
+def hide_previews():
+    for item in preview_items:
+        renderer.hide(item)
+
+def preview_hover(x,y):
+    c=characters[turn_index] if characters else None
+    if c not in heroes or current_skill not in SKILL_DICE or c.cooldowns.get(current_skill,0)>0:
+        hide_previews()
+        return
+    gx=int((x+GRID_SIZE*CELL_SIZE/2)//CELL_SIZE)
+    gy=int((y+GRID_SIZE*CELL_SIZE/2)//CELL_SIZE)
+    if current_skill in AREA_SKILLS:
+        targets=[e for e in enemies if abs(e.x-gx)<=1 and abs(e.y-gy)<=1]
+    elif any((e.x,e.y)==(gx,gy) for e in enemies):
+        # Melee always hits melee_target, whichever enemy is hovered
+        targets=[e for e in [melee_target(c)] if e]
+    else:
+        targets=[]
+    for i,e in enumerate(targets):
+        if i==len(preview_items):
+            preview_items.append(renderer.text(0,0,"","white",("Arial",10,"bold")))
+        item=preview_items[i]
+        renderer.set_text(item,preview_text(skill_preview(current_skill,e)))
+        renderer.move(item,e.turtle.xcor(),e.turtle.ycor()+60)
+        renderer.show(item)
+    for item in preview_items[len(targets):]:
+        renderer.hide(item)
+    renderer.frame()
+
 # ------------------------------
 # EFFECT
 # ------------------------------
 def show_effect(x,y,color="orange",size=40,pause=0.12):
-    effect.goto(-GRID_SIZE*CELL_SIZE//2 + x*CELL_SIZE + CELL_SIZE//2,
-                -GRID_SIZE*CELL_SIZE//2 + y*CELL_SIZE + CELL_SIZE//2)
-    effect.color(color)
-    effect.dot(size)
-    screen.update()
+    fx = renderer.circle(-GRID_SIZE*CELL_SIZE//2 + x*CELL_SIZE + CELL_SIZE//2,
+                         -GRID_SIZE*CELL_SIZE//2 + y*CELL_SIZE + CELL_SIZE//2, size, color)
+    renderer.flush()  # drawn before the blocking pause
     time.sleep(pause)
-    effect.clear()
+    renderer.delete(fx)
 
 # ------------------------------
 # HIGHLIGHT
 # ------------------------------
-def highlight_range(character,rng=1):
-    highlighter.clear()
-    highlighted_squares.clear()
-    for dx in range(-rng,rng+1):
-        for dy in range(-rng,rng+1):
-            x=character.x+dx
-            y=character.y+dy
-            if 0<=x<GRID_SIZE and 0<=y<GRID_SIZE:
-                highlighter.goto(-GRID_SIZE*CELL_SIZE//2 + x*CELL_SIZE, -GRID_SIZE*CELL_SIZE//2 + y*CELL_SIZE)
-                highlighter.stamp()
-                highlighted_squares.append((x,y))
+NEIGHBOURS = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
+battle_obstacles = set()
+range_cache = {}  # (x, y, points) -> {tile: parent tile}; cleared when the board changes
+
+def invalidate_ranges():
+    range_cache.clear()
+
+def tile_blocked(x,y,mover=None):
+    if (x,y) in battle_obstacles: return True
+    return any(c is not mover and c.hp>0 and (c.x,c.y)==(x,y) for c in characters)
+
+def reachable_tiles(character,points):
+    key=(character.x,character.y,points)
+    if key not in range_cache:
+        blocked=battle_obstacles|{(c.x,c.y) for c in characters if c is not character and c.hp>0}
+        start=(character.x,character.y)
+        parents={start:None}
+        frontier=[start]
+        for _ in range(points):
+            nxt=[]
+            for x,y in frontier:
+                for dx,dy in NEIGHBOURS:
+                    t=(x+dx,y+dy)
+                    if t in parents or t in blocked: continue
+                    if not (0<=t[0]<GRID_SIZE and 0<=t[1]<GRID_SIZE): continue
+                    parents[t]=(x,y)
+                    nxt.append(t)
+            frontier=nxt
+        range_cache[key]=parents
+    return range_cache[key]
+
+def path_to(character,tile):
+    parents=reachable_tiles(character,character.moves_left)
+    path=[]
+    while parents[tile] is not None:
+        path.append(tile)
+        tile=parents[tile]
+    path.reverse()
+    return path
+
+def draw_range(tiles):
+    # Only overlay tiles entering or leaving the range are touched
+    global highlighted_squares
+    for t in highlighted_squares-tiles:
+        renderer.hide(range_items[t])
+    for t in tiles-highlighted_squares:
+        renderer.show(range_items[t])
+    highlighted_squares=tiles
+    renderer.frame()
+
+def highlight_range(character,rng=None):
+    if rng is None: rng=character.moves_left
+    draw_range(frozenset(reachable_tiles(character,rng))-{(character.x,character.y)})
+
+def place_obstacles(count):
+    occupied={(c.x,c.y) for c in characters}
+    free=[t for t in battle_tiles if t not in occupied]
+    for t in random.sample(free,min(count,len(free))):
+        battle_obstacles.add(t)
+        renderer.recolor(battle_tiles[t],"gray")
+    invalidate_ranges()
+
+def clear_obstacles():
+    for t in battle_obstacles:
+        renderer.recolor(battle_tiles[t],"palegreen")
+    battle_obstacles.clear()
+    invalidate_ranges()
 
 def highlight_spell_tile(tile,color):
     x,y=tile
@@ -302,6 +595,7 @@ def highlight_spell_tile(tile,color):
 # ------------------------------
 def update_turn_display():
     turn_display.clear()
+    hide_previews()
     if not characters: return
     c = characters[turn_index]
     txt = f"{c.name}'s Turn"
@@ -313,38 +607,60 @@ def update_turn_display():
 # CLEANUP AND END CHECK
 # ------------------------------
 def cleanup_dead():
-    global enemies, characters
+    global enemies, characters, turn_index
+    # Keep turn_index on the same unit (or just before its successor if it died)
+    alive=[c for c in characters if c.hp>0]
+    if len(alive)!=len(characters): invalidate_ranges()
+    if characters and characters[turn_index] in alive:
+        turn_index=alive.index(characters[turn_index])
+    else:
+        turn_index=max(0,sum(1 for c in characters[:turn_index] if c.hp>0)-1)
+    for c in characters:
+        if c.hp<=0:
+            log_event("death",unit=c.name)
+            despawn(c)
     enemies=[e for e in enemies if e.hp>0]
-    characters=[c for c in characters if c.hp>0]
+    characters=alive
 
 def check_battle_end():
+    global leave_pending, battle_over
     if not enemies:
+        if pending_waves: return False  # next_turn brings in the next wave
+        if leave_pending: return True
         turn_display.clear()
         turn_display.write("Victory!", align="center", font=("Arial",24,"bold"))
-        print("Victory!")
+        log_event("battle",result="victory")
         auto_save()
+        leave_pending=True
+        screen.ontimer(leave_battle,1500)
         return True
     if not any(h.hp>0 for h in heroes):
+        if battle_over: return True
+        battle_over=True
         turn_display.clear()
         turn_display.write("Defeat...", align="center", font=("Arial",24,"bold"))
-        print("Defeat...")
+        log_event("battle",result="defeat")
         return True
     return False
 
 # ------------------------------
 # AUTO SAVE / LOAD
 # ------------------------------
+TERRAIN_CODES = {"green":"g","blue":"w","gray":"m"}
+
 def auto_save():
     data=[]
     for h in heroes:
         data.append(f"{h.name},{h.x},{h.y},{h.hp},{h.max_hp},{h.level},{h.xp}")
+    data.append("map,"+"".join(TERRAIN_CODES[t] for row in overworld_map for t in row))
+    data.append(f"explored,{explored_bits:x}")
     data.append(f"{player_pos[0]},{player_pos[1]}")
     with open(save_file,"w") as f:
         f.write("\n".join(data))
     print("Game auto-saved!")
 
 def auto_load():
-    global heroes, player_pos
+    global heroes, player_pos, explored_bits
     if not os.path.exists(save_file): return
     res=screen.textinput("Load Game?","Save found. Load? (y/n)")
     if res and res.lower()=="y":
@@ -359,11 +675,128 @@ def auto_load():
             h.level=int(info[5])
             h.xp=int(info[6])
             h.update_position()
+        extra=dict(line.split(",",1) for line in lines[len(heroes):-1])
+        codes=extra.get("map","")
+        if len(codes)==MAP_SIZE*MAP_SIZE:
+            terrain={v:k for k,v in TERRAIN_CODES.items()}
+            for i,code in enumerate(codes):
+                overworld_map[i//MAP_SIZE][i%MAP_SIZE]=terrain[code]
+            fov_cache.clear()
+            pathfinder.build_async()
+            explored_bits=int(extra.get("explored","0"),16)
         px,py=lines[-1].split(",")
         player_pos[0]=int(px)
         player_pos[1]=int(py)
         print("Game loaded!")
 
+# ------------------------------
+# ENCOUNTERS
+# Enemy units (body, hp bar and status label turtles) are pooled: a unit is
+# despawned the moment it dies and reused by the next spawn, in this battle
+# or a later one. An encounter is a list of waves; each wave arrives when
+# the previous one is wiped out.
+# ------------------------------
+ENCOUNTERS = [
+    [[("Slime",5,5,"darkred",12),("Goblin",4,4,"red",14)]],
+    [[("Slime",5,5,"darkred",12),("Slime",5,3,"darkred",12),("Goblin",3,5,"red",14)]],
+    [[("Goblin",4,4,"red",14),("Goblin",5,2,"red",14)],
+     [("Slime",5,5,"darkred",12),("Slime",5,3,"darkred",12)]],
+]
+enemy_pool = []
+battle_roster = []
+pending_waves = []
+leave_pending = False
+battle_over = False
+
+def spawn(name,x,y,color,hp):
+    if enemy_pool:
+        e=enemy_pool.pop()
+        e.reset(name,x,y,color,hp)
+    else:
+        e=Character(name,x,y,color,hp)
+    e.turtle.showturtle()
+    battle_roster.append(e)
+    return e
+
+def despawn(c):
+    # Hide a unit and its labels; enemies go back to the pool
+    c.turtle.hideturtle()
+    c.hp_bar.clear()
+    c.status_label.clear()
+    if c in battle_roster:
+        battle_roster.remove(c)
+        c.status_effects.clear()
+        enemy_pool.append(c)
+
+def free_tile(x,y):
+    if not tile_blocked(x,y): return x,y
+    return min((t for t in battle_tiles if not tile_blocked(*t)),key=lambda t: abs(t[0]-x)+abs(t[1]-y))
+
+def spawn_wave():
+    # The next wave joins the end of the turn order
+    for name,x,y,color,hp in pending_waves.pop(0):
+        e=spawn(name,*free_tile(x,y),color,hp)
+        enemies.append(e)
+        characters.append(e)
+    invalidate_ranges()
+
+def release_roster():
+    for e in list(battle_roster):
+        despawn(e)
+    pending_waves.clear()
+
+def enter_battle():
+    global battle_mode, enemies, characters, turn_index, current_skill, battle_turn, battle_over
+    screen.tracer(0)
+    battle_mode=True
+    battle_over=False
+    battle_turn=1
+    log_event("battle",result="start")
+    overworld_layer.hide()
+    player.hideturtle()
+    battle_layer.show()
+    enemies=[]
+    characters=[h for h in heroes if h.hp>0]
+    pending_waves.extend(random.choice(ENCOUNTERS))
+    spawn_wave()
+    turn_index=0
+    current_skill="basic"
+    for c in characters:
+        c.turtle.showturtle()
+        c.update_position()
+    place_obstacles(BATTLE_ROCKS)
+    characters[0].moves_left=characters[0].move
+    log_event("turn",unit=characters[0].name,turn=battle_turn)
+    update_turn_display()
+    highlight_range(characters[0])
+    screen.update()
+    screen.tracer(1)
+    print("An enemy party appears!")
+
+def leave_battle():
+    global battle_mode, enemies, characters, leave_pending, selecting_spell_target, selected_target_tile
+    screen.tracer(0)
+    battle_mode=False
+    leave_pending=False
+    selecting_spell_target=False
+    selected_target_tile=None
+    highlighter.clear()
+    draw_range(frozenset())
+    clear_obstacles()
+    stun_icon.hideturtle()
+    turn_display.clear()
+    release_roster()
+    enemies=[]
+    characters=[]
+    for h in heroes:
+        h.turtle.hideturtle()
+        h.update_position()
+    battle_layer.hide()
+    overworld_layer.show()
+    player.showturtle()
+    screen.update()
+    screen.tracer(1)
+
 # ------------------------------
 # ENEMY AI
 # ------------------------------
@@ -372,10 +805,12 @@ def enemy_ai(enemy):
     target=min([h for h in heroes if h.hp>0], key=lambda h: abs(h.x-enemy.x)+abs(h.y-enemy.y))
     if abs(enemy.x-target.x)>1:
         step_x=1 if target.x>enemy.x else -1
-        enemy.animate_move(enemy.x+step_x,enemy.y)
+        if not tile_blocked(enemy.x+step_x,enemy.y,enemy):
+            enemy.animate_move(enemy.x+step_x,enemy.y)
     elif abs(enemy.y-target.y)>1:
         step_y=1 if target.y>enemy.y else -1
-        enemy.animate_move(enemy.x,enemy.y+step_y)
+        if not tile_blocked(enemy.x,enemy.y+step_y,enemy):
+            enemy.animate_move(enemy.x,enemy.y+step_y)
     if abs(enemy.x-target.x)<=1 and abs(enemy.y-target.y)<=1:
         enemy.attack(target,"basic")
 
@@ -383,20 +818,29 @@ def enemy_ai(enemy):
 # TURN LOGIC
 # ------------------------------
 def next_turn():
-    global turn_index
+    global turn_index, battle_turn
     cleanup_dead()
+    if not enemies and pending_waves:
+        spawn_wave()
+        print("More enemies arrive!")
     if check_battle_end(): return
     turn_index=(turn_index+1)%len(characters)
     unit=characters[turn_index]
+    battle_turn+=1
+    log_event("turn",unit=unit.name,turn=battle_turn)
     stunned=unit.apply_status_start_turn()
     cleanup_dead()
     if check_battle_end(): return
+    if unit not in characters:  # died to its own status tick
+        next_turn()
+        return
     if stunned:
         unit.reduce_cooldowns()
         next_turn()
         return
     update_turn_display()
     if unit in heroes:
+        unit.moves_left=unit.move
         highlight_range(unit)
     else:
         enemy_ai(unit)
@@ -408,7 +852,7 @@ def next_turn():
 # ------------------------------
 def on_click(x,y):
     global selecting_spell_target, selected_target_tile
-    if not characters or check_battle_end(): return
+    if not battle_mode or not characters or check_battle_end(): return
     c = characters[turn_index]
     if c not in heroes: return
     gx=int((x+GRID_SIZE*CELL_SIZE/2)//CELL_SIZE)
@@ -421,9 +865,18 @@ def on_click(x,y):
         player_use_skill()
         return
     if (gx,gy) in highlighted_squares:
-        c.animate_move(gx,gy)
+        path=path_to(c,(gx,gy))
+        c.moves_left-=len(path)
+        for x,y in path:
+            c.animate_move(x,y)
         highlight_range(c)
 
+def melee_target(c):
+    for e in enemies:
+        if abs(c.x-e.x)<=1 and abs(c.y-e.y)<=1:
+            return e
+    return None
+
 def player_use_skill():
     global current_skill, selecting_spell_target, selected_target_tile
     c=characters[turn_index]
@@ -433,10 +886,7 @@ def player_use_skill():
         return
     target=None
     if current_skill in ("basic","strong"):
-        for e in enemies:
-            if abs(c.x-e.x)<=1 and abs(c.y-e.y)<=1:
-                target=e
-                break
+        target=melee_target(c)
     elif selected_target_tile:
         gx,gy=selected_target_tile
         dummy=type("Dummy",(),{"x":gx,"y":gy})
@@ -459,60 +909,134 @@ def set_skill(s):
     update_turn_display()
 
 def move_player(dx,dy):
+    if battle_mode: return
     new_x = player_pos[0]+dx
     new_y = player_pos[1]+dy
     if 0<=new_x<MAP_SIZE and 0<=new_y<MAP_SIZE:
         if overworld_map[new_y][new_x]!="gray":  # can't walk into mountains
             player_pos[0]=new_x
             player_pos[1]=new_y
-            player.goto(-MAP_SIZE*OVERWORLD_CELL//2 + new_x*OVERWORLD_CELL + OVERWORLD_CELL//2,
-                        -MAP_SIZE*OVERWORLD_CELL//2 + new_y*OVERWORLD_CELL + OVERWORLD_CELL//2)
+            place_player()
+            update_fov()
+            if overworld_map[new_y][new_x]=="green" and random.random()<ENCOUNTER_RATE:
+                enter_battle()
 
-screen.onkey(lambda:move_player(0,1),"Up")
-screen.onkey(lambda:move_player(0,-1),"Down")
-screen.onkey(lambda:move_player(-1,0),"Left")
-screen.onkey(lambda:move_player(1,0),"Right")
-screen.listen()
+# ------------------------------
+# INPUT QUEUE
+# Tk callbacks only enqueue commands; process_input drains them once per
+# frame. Movement keys collapse to one step per frame, and commands queued
+# for another scene or another unit's turn are dropped. Mouse hovers keep a
+# single slot of their own, so they can never push keys out of the queue.
+# ------------------------------
+input_queue = deque(maxlen=INPUT_QUEUE_SIZE)
+input_busy = False
+pending_hover = None
+BATTLE_ONLY = ("click","use","end")
+
+def input_context():
+    if not battle_mode: return ("overworld",)
+    return ("battle", characters[turn_index] if characters else None)
+
+def queue_input(kind,*args):
+    input_queue.append((kind,args,input_context()))
+
+def queue_hover(x,y):
+    global pending_hover
+    pending_hover=(x,y,input_context())
+
+def process_input():
+    global input_busy, pending_hover
+    # screen.update() inside animations can fire this timer again
+    if not input_busy:
+        input_busy=True
+        try:
+            pending=list(input_queue)
+            input_queue.clear()
+            last_move=max((i for i,cmd in enumerate(pending) if cmd[0]=="move"),default=None)
+            for i,(kind,args,ctx) in enumerate(pending):
+                if kind=="move": travel_path.clear()
+                if kind=="move" and i!=last_move: continue
+                if ctx!=input_context(): continue
+                if kind in BATTLE_ONLY and not battle_mode: continue
+                INPUT_HANDLERS[kind](*args)
+            if travel_path and last_move is None:
+                travel_step()
+            if pending_hover:
+                x,y,ctx=pending_hover
+                pending_hover=None
+                if battle_mode and ctx==input_context(): preview_hover(x,y)
+        finally:
+            input_busy=False
+    screen.ontimer(process_input,FRAME_MS)
+
+# ------------------------------
+# CLICK TO TRAVEL
+# ------------------------------
+def travel_to(x,y):
+    tx=int((x+MAP_SIZE*OVERWORLD_CELL/2)//OVERWORLD_CELL)
+    ty=int((y+MAP_SIZE*OVERWORLD_CELL/2)//OVERWORLD_CELL)
+    if not (0<=tx<MAP_SIZE and 0<=ty<MAP_SIZE) or not explored_bits>>(ty*MAP_SIZE+tx)&1:
+        return
+    path=pathfinder.find_path(player_pos,(tx,ty))
+    if path is None:
+        print("Can't find a way there.")
+        return
+    travel_path.clear()
+    travel_path.extend(path)
+
+def travel_step():
+    # One tile per frame, through move_player so fog and encounters still apply
+    if battle_mode:
+        travel_path.clear()
+        return
+    nx,ny=travel_path.popleft()
+    move_player(nx-player_pos[0],ny-player_pos[1])
+
+INPUT_HANDLERS = {"move":move_player,"click":on_click,"travel":travel_to,"skill":set_skill,"use":player_use_skill,"end":end_turn}
 
 # ------------------------------
 # KEY BINDINGS
 # ------------------------------
 screen.listen()
-screen.onkey(lambda:set_skill("basic"),"b")
-screen.onkey(lambda:set_skill("strong"),"s")
-screen.onkey(lambda:set_skill("fireball"),"f")
-screen.onkey(lambda:set_skill("lightning"),"l")
-screen.onkey(lambda:set_skill("heal"),"h")
-screen.onkey(lambda:set_skill("ice"),"i")
-screen.onkey(player_use_skill,"Return")
-screen.onkey(end_turn,"e")
-screen.onclick(on_click)
+screen.onkey(lambda:queue_input("move",0,1),"Up")
+screen.onkey(lambda:queue_input("move",0,-1),"Down")
+screen.onkey(lambda:queue_input("move",-1,0),"Left")
+screen.onkey(lambda:queue_input("move",1,0),"Right")
+screen.onkey(lambda:queue_input("skill","basic"),"b")
+screen.onkey(lambda:queue_input("skill","strong"),"s")
+screen.onkey(lambda:queue_input("skill","fireball"),"f")
+screen.onkey(lambda:queue_input("skill","lightning"),"l")
+screen.onkey(lambda:queue_input("skill","heal"),"h")
+screen.onkey(lambda:queue_input("skill","ice"),"i")
+screen.onkey(lambda:queue_input("use"),"Return")
+screen.onkey(lambda:queue_input("end"),"e")
+screen.onclick(lambda x,y:queue_input("click" if battle_mode else "travel",x,y))
+canvas=screen.getcanvas()
+canvas.bind("<Motion>",lambda ev:queue_hover(canvas.canvasx(ev.x),-canvas.canvasy(ev.y)),add="+")
 
 # ------------------------------
 # INIT HEROES
 # ------------------------------
-hero=Character("Hero",0,0,"green",hp=30)
+hero=Character("Hero",0,0,"green",hp=30,move=3)
 mage=Character("Mage",0,1,"blue",hp=26)
 cleric=Character("Cleric",1,0,"cyan",hp=28)
 heroes=[hero,mage,cleric]
 
-# ------------------------------
-# TEST ENEMIES
-# ------------------------------
-e1=Character("Slime",5,5,"darkred",hp=12)
-e2=Character("Goblin",4,4,"red",hp=14)
-enemies=[e1,e2]
-characters=heroes+enemies
+for h in heroes:
+    h.turtle.hideturtle()
 
 # ------------------------------
 # START GAME
 # ------------------------------
 auto_load()
-update_turn_display()
-highlight_range(heroes[0])
+place_player()
+update_fov()
+reveal_explored()
+screen.ontimer(process_input,FRAME_MS)
 print("Controls:")
-print("Click yellow squares to move.")
+print("Arrow keys or click an explored tile = explore the overworld")
+print("Click yellow squares to move (movement points reset each turn).")
 print("b,s,f,l,h,i = choose skill")
-print("Enter = use skill")
+print("Enter = use skill (hover a tile to preview its damage)")
 print("e = end turn")
 turtle.done()
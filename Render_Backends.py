@@ -0,0 +1,302 @@
+# ------------------------------
+# Render Backends
+# Pluggable drawing layer for effects, particles and popups.
+#   "turtle" - one turtle per item (original behaviour)
+#   "canvas" - persistent Tk canvas items, moved with canvas.coords
+#   "null"   - records items only, for running without a window
+# Coordinates are turtle coordinates (origin centre, y up).
+# frame() only marks the renderer dirty and the screen is flushed once at
+# the end of the frame (frame_ms), however many effects drew in it. Code
+# that blocks right after drawing (time.sleep) calls flush() to draw now.
+# ------------------------------
+
+import turtle
+
+# ------------------------------
+# BASE
+# ------------------------------
+class Renderer:
+    screen = None
+    dirty = False
+    frame_ms = 30
+
+    def circle(self,x,y,size,color): raise NotImplementedError
+    def text(self,x,y,txt,color="white",font=("Arial",12,"bold")): raise NotImplementedError
+    def rect(self,x,y,w,h,color,outline=""): raise NotImplementedError
+    def to_back(self,item): pass
+    def move(self,item,x,y): raise NotImplementedError
+    def recolor(self,item,color): raise NotImplementedError
+    def set_text(self,item,txt): raise NotImplementedError
+    def show(self,item): raise NotImplementedError
+    def hide(self,item): raise NotImplementedError
+    def delete(self,item): raise NotImplementedError
+    def flush(self): pass
+
+    def frame(self):
+        if self.screen is None:
+            self.flush()
+            return
+        if self.dirty: return
+        self.dirty = True
+        self.screen.ontimer(self._flush_frame,self.frame_ms)
+
+    def _flush_frame(self):
+        self.dirty = False
+        self.flush()
+
+    def resize(self,item,size): raise NotImplementedError
+
+    def move_many(self,items,positions,sizes=None):
+        if sizes is not None:
+            for item,size in zip(items,sizes):
+                self.resize(item,size)
+        for item,(x,y) in zip(items,positions):
+            self.move(item,x,y)
+
+# ------------------------------
+# TURTLE BACKEND
+# ------------------------------
+class TurtleRenderer(Renderer):
+    def __init__(self,screen):
+        self.screen = screen
+        self.texts = {}  # text turtle -> (txt, font)
+        self.rects = {}  # rect turtle -> (w, h)
+
+    def circle(self,x,y,size,color):
+        t = turtle.Turtle()
+        t.hideturtle()
+        t.penup()
+        t.shape("circle")
+        t.color(color)
+        t.shapesize(size/20,size/20)
+        t.goto(x,y)
+        t.showturtle()
+        return t
+
+    def text(self,x,y,txt,color="white",font=("Arial",12,"bold")):
+        t = turtle.Turtle()
+        t.hideturtle()
+        t.penup()
+        t.color(color)
+        t.goto(x,y)
+        t.write(txt,align="center",font=font)
+        self.texts[t] = (txt,font)
+        return t
+
+    def rect(self,x,y,w,h,color,outline=""):
+        t = turtle.Turtle()
+        t.hideturtle()
+        t.penup()
+        t.shape("square")
+        t.shapesize(h/20,w/20)
+        t.color(outline or color,color)
+        t.goto(x+w/2,y+h/2)
+        t.showturtle()
+        self.rects[t] = (w,h)
+        return t
+
+    def to_back(self,item):
+        # Lower the turtle's shape on the Tk canvas (one item, or a list for
+        # compound shapes); turtle keeps the same items when it redraws.
+        shape_items = item.turtle._item
+        canvas = self.screen.getcanvas()
+        for i in shape_items if isinstance(shape_items,list) else [shape_items]:
+            canvas.tag_lower(i)
+
+    def _rewrite(self,t):
+        txt,font = self.texts[t]
+        t.clear()
+        t.write(txt,align="center",font=font)
+
+    def move(self,item,x,y):
+        if item in self.rects:
+            w,h = self.rects[item]
+            x,y = x+w/2,y+h/2
+        item.goto(x,y)
+        if item in self.texts:
+            self._rewrite(item)
+
+    def resize(self,item,size):
+        item.shapesize(size/20,size/20)
+
+    def recolor(self,item,color):
+        if item in self.rects: item.fillcolor(color)
+        else: item.color(color)
+        if item in self.texts:
+            self._rewrite(item)
+
+    def set_text(self,item,txt):
+        self.texts[item] = (txt,self.texts[item][1])
+        self._rewrite(item)
+
+    def show(self,item):
+        if item in self.texts: self._rewrite(item)
+        else: item.showturtle()
+
+    def hide(self,item):
+        item.hideturtle()
+        item.clear()
+
+    def delete(self,item):
+        self.hide(item)
+        self.texts.pop(item,None)
+        self.rects.pop(item,None)
+
+    def flush(self):
+        self.screen.update()
+
+# ------------------------------
+# CANVAS BACKEND
+# ------------------------------
+class CanvasRenderer(Renderer):
+    def __init__(self,screen):
+        self.screen = screen
+        self.canvas = screen.getcanvas()
+        self.radius = {}  # oval id -> radius
+        self.rects = {}  # rectangle id -> (w, h)
+
+    def circle(self,x,y,size,color):
+        r = size/2
+        item = self.canvas.create_oval(x-r,-y-r,x+r,-y+r,fill=color,outline="")
+        self.radius[item] = r
+        return item
+
+    def text(self,x,y,txt,color="white",font=("Arial",12,"bold")):
+        return self.canvas.create_text(x,-y,text=txt,fill=color,font=font,anchor="s")
+
+    def rect(self,x,y,w,h,color,outline=""):
+        item = self.canvas.create_rectangle(x,-y-h,x+w,-y,fill=color,outline=outline)
+        self.rects[item] = (w,h)
+        return item
+
+    def to_back(self,item):
+        self.canvas.tag_lower(item)
+
+    def move(self,item,x,y):
+        r = self.radius.get(item)
+        if r is not None:
+            self.canvas.coords(item,x-r,-y-r,x+r,-y+r)
+        elif item in self.rects:
+            w,h = self.rects[item]
+            self.canvas.coords(item,x,-y-h,x+w,-y)
+        else:
+            self.canvas.coords(item,x,-y)
+
+    def resize(self,item,size):
+        # takes effect on the next move
+        self.radius[item] = size/2
+
+    def recolor(self,item,color):
+        self.canvas.itemconfigure(item,fill=color)
+
+    def set_text(self,item,txt):
+        self.canvas.itemconfigure(item,text=txt)
+
+    def show(self,item):
+        self.canvas.itemconfigure(item,state="normal")
+
+    def hide(self,item):
+        self.canvas.itemconfigure(item,state="hidden")
+
+    def delete(self,item):
+        self.canvas.delete(item)
+        self.radius.pop(item,None)
+        self.rects.pop(item,None)
+
+    def flush(self):
+        self.canvas.update_idletasks()
+
+# ------------------------------
+# NULL BACKEND
+# ------------------------------
+class NullRenderer(Renderer):
+    def __init__(self,screen=None):
+        self.items = {}
+        self.next_id = 0
+        self.frames = 0
+
+    def _new(self,**info):
+        self.next_id += 1
+        info["visible"] = True
+        self.items[self.next_id] = info
+        return self.next_id
+
+    def circle(self,x,y,size,color):
+        return self._new(kind="circle",x=x,y=y,size=size,color=color)
+
+    def text(self,x,y,txt,color="white",font=("Arial",12,"bold")):
+        return self._new(kind="text",x=x,y=y,text=txt,color=color)
+
+    def rect(self,x,y,w,h,color,outline=""):
+        return self._new(kind="rect",x=x,y=y,w=w,h=h,color=color)
+
+    def move(self,item,x,y):
+        self.items[item]["x"] = x
+        self.items[item]["y"] = y
+
+    def resize(self,item,size):
+        self.items[item]["size"] = size
+
+    def recolor(self,item,color):
+        self.items[item]["color"] = color
+
+    def set_text(self,item,txt):
+        self.items[item]["text"] = txt
+
+    def show(self,item):
+        self.items[item]["visible"] = True
+
+    def hide(self,item):
+        self.items[item]["visible"] = False
+
+    def delete(self,item):
+        self.items.pop(item,None)
+
+    def flush(self):
+        self.frames += 1
+
+# ------------------------------
+# LAYERS
+# A retained group of items shown and hidden together.
+# ------------------------------
+class Layer:
+    def __init__(self,renderer,visible=True):
+        self.renderer = renderer
+        self.items = []
+        self.visible = visible
+
+    def add(self,item):
+        self.items.append(item)
+        if not self.visible:
+            self.renderer.hide(item)
+        return item
+
+    def show(self):
+        if self.visible: return
+        for item in self.items:
+            self.renderer.show(item)
+        self.visible = True
+
+    def hide(self):
+        if not self.visible: return
+        for item in self.items:
+            self.renderer.hide(item)
+        self.visible = False
+
+    def to_back(self):
+        for item in reversed(self.items):
+            self.renderer.to_back(item)
+
+    def clear(self):
+        for item in self.items:
+            self.renderer.delete(item)
+        self.items.clear()
+
+BACKENDS = {"turtle":TurtleRenderer,"canvas":CanvasRenderer,"null":NullRenderer}
+
+def make_renderer(name,screen=None,frame_ms=30):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown render backend {name!r} (choose from {', '.join(BACKENDS)})")
+    renderer = BACKENDS[name](screen)
+    renderer.frame_ms = frame_ms
+    return renderer
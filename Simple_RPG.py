@@ -1,6 +1,34 @@
 import turtle
 import random
 import math
+import os
+import sys
+import time
+from Render_Backends import make_renderer
+from Battle_Log import BattleLog
+from Damage_Preview import cached, convolve, fixed, mix, preview, uniform
+from Lockstep import Peer, state_hash, ACTION_REGULAR, ACTION_SPECIAL
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RENDER_BACKEND = "canvas"  # "turtle", "canvas" or "null"
+PARTICLE_ANGLES = 32  # burst directions are quantised to this many angles
+PARTICLE_STEPS = 6
+PARTICLE_SIZE = 10
+PARTICLE_GRAVITY = 0.35  # drop by the last step, as a fraction of distance
+EFFECT_INTENSITY = 1.0  # effect detail ceiling, 0.25-1.0; lower it on slow machines
+ADAPTIVE_EFFECTS = True  # scale effects down while frames run late
+FRAME_BUDGET_MS = 30  # animation tick the effects are written for
+MIN_EFFECT_QUALITY = 0.25
+MAX_POPUPS = 12  # floating texts on screen at full quality
+BATTLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "battle_log_simple.jsonl")  # .gz to compress, None for no log
+# Reinforcements, each wave arriving when the last is wiped out:
+# (name, color, x, y, hp, attack)
+ENEMY_WAVES = [
+    [("Enemy3","darkred",400,0,90,16)],
+]
 
 # ---------------------------
 # Screen Setup
@@ -10,6 +38,65 @@ screen.title("Turn-Based RPG")
 screen.bgcolor("lightblue")
 screen.tracer(0)
 screen.setup(width=1200, height=600)
+renderer = make_renderer(RENDER_BACKEND, screen, FRAME_BUDGET_MS)
+
+# ---------------------------
+# Co-op Link
+# python Simple_RPG.py host   (controls Player)
+# python Simple_RPG.py join   (controls Ally1)
+# ---------------------------
+# Gameplay rolls use rng so both games stay in lockstep;
+# purely visual randomness keeps using the random module.
+NET_ROLE = sys.argv[1] if len(sys.argv)>1 and sys.argv[1] in ("host","join") else None
+try:
+    peer = Peer(NET_ROLE) if NET_ROLE else None
+except TimeoutError:
+    sys.exit("No partner connected in time; start the other game and try again.")
+except OSError as e:
+    sys.exit(f"Could not link with partner: {e}")
+rng = random.Random(peer.seed if peer else None)
+local_unit = {"host":"Player","join":"Ally1"}.get(NET_ROLE)
+turn_number = 0
+
+# ---------------------------
+# Battle Log
+# ---------------------------
+# Each co-op peer writes its own file; writing happens off the Tk thread.
+battle_log = None
+if BATTLE_LOG:
+    battle_log = BattleLog(BATTLE_LOG.replace(".jsonl", f"-{NET_ROLE}.jsonl") if NET_ROLE else BATTLE_LOG)
+
+def log_event(kind, **fields):
+    if battle_log: battle_log.emit(kind, **fields)
+
+# ---------------------------
+# Frame Budget
+# ---------------------------
+# A heartbeat on the animation tick measures how late frames run. Quality drops
+# fast while the average is over budget and creeps back with headroom. Effects
+# read it when they start; gameplay rolls never do, so co-op stays in step.
+effect_quality = EFFECT_INTENSITY
+frame_ms = FRAME_BUDGET_MS
+last_tick = None
+live_popups = 0
+
+def governor_tick():
+    global effect_quality, frame_ms, last_tick
+    now = time.perf_counter()
+    if last_tick is not None:
+        # Cap each sample so one stall (blocking input(), dragging the window)
+        # counts as a single late frame rather than a second of them
+        dt = min((now-last_tick)*1000, 2*FRAME_BUDGET_MS)
+        frame_ms = 0.8*frame_ms + 0.2*dt
+        if frame_ms > FRAME_BUDGET_MS*1.25:
+            effect_quality = max(MIN_EFFECT_QUALITY, effect_quality*0.9)
+        elif frame_ms < FRAME_BUDGET_MS*1.1:
+            effect_quality = min(EFFECT_INTENSITY, effect_quality+0.02)
+    last_tick = now
+    screen.ontimer(governor_tick, FRAME_BUDGET_MS)
+
+def scaled(n, least=1):
+    return max(least, round(n*effect_quality))
 
 # ---------------------------
 # Character Class
@@ -39,6 +126,24 @@ class Character:
         self.turtle.penup()
         self.turtle.goto(x, y)
 
+    def reset(self, name, color, x, y, hp, attack):
+        # Reuse a despawned unit (and its turtle) for a new enemy
+        self.name = name
+        self.color = color
+        self.x = x
+        self.y = y
+        self.hp = hp
+        self.max_hp = hp
+        self.attack = attack
+        self.status = None
+        self.status_duration = 0
+        self.special_cd = 0
+        self.message_count = 0
+        for k in self.status_cd: self.status_cd[k] = 0
+        self.turtle.color(color)
+        self.turtle.goto(x, y)
+        self.turtle.showturtle()
+
     def flash(self, color=None, duration=200):
         orig = self.turtle.color()[0]
         self.turtle.color(color if color else "white")
@@ -67,6 +172,7 @@ class Character:
 # ---------------------------
 def shake_character(character, intensity=5, shakes=6, callback=None):
     ox, oy = character.turtle.pos()
+    shakes = scaled(shakes, 2)//2*2  # even, so it ends where it started
     step = 0
     def do_shake():
         nonlocal step
@@ -86,6 +192,34 @@ def shake_character(character, intensity=5, shakes=6, callback=None):
 # ---------------------------
 # Particle Effects
 # ---------------------------
+# Offsets for a unit-distance burst, indexed [angle][step], plus the particle
+# size per step. Built once, so a frame is a lookup and one bulk move.
+def build_particle_tables():
+    if np is not None:
+        angles = np.arange(PARTICLE_ANGLES)*2*math.pi/PARTICLE_ANGLES
+        t = np.arange(1,PARTICLE_STEPS+1)/PARTICLE_STEPS
+        ease = 1-(1-t)**2
+        dx = np.cos(angles)[:,None]*ease[None,:]
+        dy = np.sin(angles)[:,None]*ease[None,:] - PARTICLE_GRAVITY*t[None,:]**2
+        sizes = PARTICLE_SIZE*(1-0.6*t)
+        return dx, dy, sizes.tolist()
+    dx, dy = [], []
+    ts = [(s+1)/PARTICLE_STEPS for s in range(PARTICLE_STEPS)]
+    for a in range(PARTICLE_ANGLES):
+        rad = a*2*math.pi/PARTICLE_ANGLES
+        dx.append([math.cos(rad)*(1-(1-t)**2) for t in ts])
+        dy.append([math.sin(rad)*(1-(1-t)**2) - PARTICLE_GRAVITY*t*t for t in ts])
+    return dx, dy, [PARTICLE_SIZE*(1-0.6*t) for t in ts]
+
+PARTICLE_DX, PARTICLE_DY, PARTICLE_SIZES = build_particle_tables()
+
+def particle_positions(px, py, distance, angle_ids, step):
+    if np is not None:
+        xs = px + distance*PARTICLE_DX[angle_ids, step]
+        ys = py + distance*PARTICLE_DY[angle_ids, step]
+        return zip(xs.tolist(), ys.tolist())
+    return [(px+distance*PARTICLE_DX[a][step], py+distance*PARTICLE_DY[a][step]) for a in angle_ids]
+
 def particle_effect(character, count=10, distance=15, color="yellow", callback=None):
     character.particle_queue.append((count, distance, color, callback))
     if character.particle_running: return
@@ -96,44 +230,34 @@ def particle_effect(character, count=10, distance=15, color="yellow", callback=N
             return
         character.particle_running = True
         count, distance, color, callback_inner = character.particle_queue.pop(0)
+        count = scaled(count)
 
         for p in character.active_particles:
-            p.hideturtle()
-            p.clear()
+            renderer.delete(p)
         character.active_particles.clear()
 
+        px, py = character.turtle.pos()
         particles = []
         for _ in range(count):
-            p = turtle.Turtle()
-            p.hideturtle()
-            p.penup()
-            p.shape("circle")
-            p.color(color)
-            p.shapesize(0.5,0.5)
-            px, py = character.turtle.pos()
-            p.goto(px, py)
-            p.showturtle()
+            p = renderer.circle(px, py, PARTICLE_SIZE, color)
             particles.append(p)
             character.active_particles.append(p)
 
-        steps = 6
         step = 0
-        angles = [random.uniform(0,360) for _ in range(count)]
+        angle_ids = [random.randrange(PARTICLE_ANGLES) for _ in range(count)]
+        if np is not None:
+            angle_ids = np.array(angle_ids)
         def animate():
             nonlocal step
-            if step < steps:
-                for i,p in enumerate(particles):
-                    rad = angles[i]*math.pi/180
-                    dx = distance/steps*math.cos(rad)
-                    dy = distance/steps*math.sin(rad)
-                    p.goto(p.xcor()+dx, p.ycor()+dy)
-                screen.update()
+            if step < PARTICLE_STEPS:
+                renderer.move_many(particles, particle_positions(px, py, distance, angle_ids, step),
+                                   [PARTICLE_SIZES[step]]*count)
+                renderer.frame()
                 step +=1
                 screen.ontimer(animate,30)
             else:
                 for p in particles:
-                    p.hideturtle()
-                    p.clear()
+                    renderer.delete(p)
                 character.active_particles.clear()
                 if callback_inner:
                     callback_inner()
@@ -144,52 +268,39 @@ def particle_effect(character, count=10, distance=15, color="yellow", callback=N
 # ---------------------------
 # Floating Damage
 # ---------------------------
-def show_damage(target, dmg, crit=False, hit_num=1):
-    dmg_turtle = turtle.Turtle()
-    dmg_turtle.hideturtle()
-    dmg_turtle.penup()
-    dmg_turtle.color("yellow" if crit else "white")
-    y_offset = 40 + (hit_num-1)*15
-    dmg_turtle.goto(target.turtle.xcor(), target.turtle.ycor() + y_offset)
-    dmg_turtle.write(str(dmg), align="center", font=("Arial", 14, "bold"))
-    steps = 15
+def float_text(x, y, text, color, font, steps):
+    global live_popups
+    if live_popups >= scaled(MAX_POPUPS, 2): return  # busy screen: drop it
+    live_popups += 1
+    rise = 2*steps
+    steps = scaled(steps, 5)
+    item = renderer.text(x, y, text, color, font)
     step = 0
     def animate():
+        global live_popups
         nonlocal step
         if step < steps:
-            x,y = dmg_turtle.pos()
-            dmg_turtle.goto(x, y+2)
             step += 1
+            renderer.move(item, x, y+rise*step/steps)
+            renderer.frame()
             screen.ontimer(animate, 30)
         else:
-            dmg_turtle.clear()
-            dmg_turtle.hideturtle()
+            renderer.delete(item)
+            live_popups -= 1
     animate()
 
+def show_damage(target, dmg, crit=False, hit_num=1):
+    y_offset = 40 + (hit_num-1)*15
+    float_text(target.turtle.xcor(), target.turtle.ycor() + y_offset, str(dmg),
+               "yellow" if crit else "white", ("Arial", 14, "bold"), 15)
+
 # ---------------------------
 # Floating Status Message
 # ---------------------------
 def show_status_message(character, status_text, color="white", current_messages=0):
-    msg_turtle = turtle.Turtle()
-    msg_turtle.hideturtle()
-    msg_turtle.penup()
-    msg_turtle.color(color)
     y_offset = 50 + current_messages*15
-    msg_turtle.goto(character.turtle.xcor(), character.turtle.ycor() + y_offset)
-    msg_turtle.write(status_text, align="center", font=("Arial", 12, "bold"))
-    steps=20
-    step=0
-    def animate():
-        nonlocal step
-        if step<steps:
-            x,y=msg_turtle.pos()
-            msg_turtle.goto(x, y+2)
-            step+=1
-            screen.ontimer(animate,30)
-        else:
-            msg_turtle.clear()
-            msg_turtle.hideturtle()
-    animate()
+    float_text(character.turtle.xcor(), character.turtle.ycor() + y_offset, status_text,
+               color, ("Arial", 12, "bold"), 20)
 
 # ---------------------------
 # Teams
@@ -206,61 +317,140 @@ enemies = [
 # ---------------------------
 # Health Display
 # ---------------------------
-health_display = turtle.Turtle()
-health_display.hideturtle()
-health_display.penup()
-health_display.goto(0,250)
+# One text turtle per unit; a line is only rewritten when its text changes.
+# Label turtles of despawned units go back to label_pool.
+HUD_SPACING=300
+hud_turtles={}
+hud_cache={}
+label_pool=[]
+def label_turtle():
+    if label_pool: return label_pool.pop()
+    t=turtle.Turtle()
+    t.hideturtle()
+    t.penup()
+    return t
 def clamp_hp(c): c.hp=max(0,c.hp)
+def hud_line(c):
+    return f"{c.name} HP: {c.hp} ({c.status if c.status else 'Normal'})"
+def add_hud(c):
+    team=players if c.is_player else enemies
+    t=label_turtle()
+    t.goto((team.index(c)-(len(team)-1)/2)*HUD_SPACING, 275 if c.is_player else 250)
+    hud_turtles[c]=t
+def init_hud():
+    for c in players+enemies:
+        add_hud(c)
 def update_health():
-    health_display.clear()
-    text=""
-    for p in players:
-        clamp_hp(p)
-        text+=f"{p.name} HP: {p.hp} ({p.status if p.status else 'Normal'})  "
-    text+="\n"
-    for e in enemies:
-        clamp_hp(e)
-        text+=f"{e.name} HP: {e.hp} ({e.status if e.status else 'Normal'})  "
-    health_display.write(text,align="center",font=("Arial",16,"bold"))
+    for c,t in hud_turtles.items():
+        clamp_hp(c)
+        line=hud_line(c)
+        if hud_cache.get(c)==line: continue
+        hud_cache[c]=line
+        t.clear()
+        t.write(line,align="center",font=("Arial",16,"bold"))
 
 # ---------------------------
 # Status Icons
 # ---------------------------
 status_turtles={}
+status_cache={}
+STATUS_COLORS={"Burned":"orange","Bleeding":"red","Shocked":"yellow","Frozen":"cyan"}
+def add_status_icon(c):
+    t=label_turtle()
+    t.goto(c.turtle.xcor(), c.turtle.ycor()+40)
+    status_turtles[c]=t
 def init_status_icons():
     for c in players+enemies:
-        t=turtle.Turtle()
-        t.hideturtle()
-        t.penup()
-        t.goto(c.turtle.xcor(), c.turtle.ycor()+40)
-        status_turtles[c]=t
+        add_status_icon(c)
 def update_status_icons():
     for c,t in status_turtles.items():
+        shown=c.status if c.hp>0 else None
+        key=(c.turtle.xcor(), c.turtle.ycor(), shown)
+        if status_cache.get(c)==key: continue
+        status_cache[c]=key
         t.clear()
         t.goto(c.turtle.xcor(), c.turtle.ycor()+40)
-        if c.status is None or c.hp<=0:
+        if shown is None:
             continue
-        color_map={"Burned":"orange","Bleeding":"red","Shocked":"yellow","Frozen":"cyan"}
-        t.color(color_map.get(c.status,"white"))
-        t.write(c.status,align="center",font=("Arial",10,"bold"))
-
-def update_all_visuals():
+        t.color(STATUS_COLORS.get(shown,"white"))
+        t.write(shown,align="center",font=("Arial",10,"bold"))
+
+# Several update requests within one frame collapse into a single redraw.
+visuals_pending=False
+def flush_visuals():
+    global visuals_pending
+    visuals_pending=False
     update_health()
     update_status_icons()
     screen.update()
 
+def update_all_visuals():
+    global visuals_pending
+    if visuals_pending: return
+    visuals_pending=True
+    screen.ontimer(flush_visuals,0)
+
+# ---------------------------
+# Spawning
+# ---------------------------
+# Dead units are despawned at the start of the next turn, once their hit
+# animations are over. Dead enemies wait in unit_pool for the next wave.
+unit_pool=[]
+despawned=set()
+waves_spawned=0
+def despawn(c):
+    log_event("death", unit=c.name)
+    c.turtle.hideturtle()
+    for table,cache in ((hud_turtles,hud_cache),(status_turtles,status_cache)):
+        t=table.pop(c,None)
+        cache.pop(c,None)
+        if t:
+            t.clear()
+            label_pool.append(t)
+    despawned.add(c)
+    if not c.is_player: unit_pool.append(c)
+
+def despawn_dead():
+    for c in players+enemies:
+        if c.hp<=0 and c not in despawned: despawn(c)
+
+def spawn_wave():
+    # Wave units take over the dead enemies' slots, so command indexes match on both peers
+    global waves_spawned
+    wave=ENEMY_WAVES[waves_spawned]
+    waves_spawned+=1
+    enemies[:]=[]
+    for name,color,x,y,hp,attack in wave:
+        if unit_pool:
+            e=unit_pool.pop(0)
+            despawned.discard(e)
+            e.reset(name,color,x,y,hp,attack)
+        else:
+            e=Character(name,color,x,y,hp=hp,attack=attack)
+        enemies.append(e)
+    for e in enemies:
+        add_hud(e)
+        add_status_icon(e)
+    turn_queue[:]=[c for c in turn_queue if c.is_player]  # reused units act from the next round
+    print(f"Wave {waves_spawned+1} arrives: {', '.join(e.name for e in enemies)}!")
+
 # ---------------------------
 # Apply Status
 # ---------------------------
+def status_damage(c, amount, status, source):
+    c.hp-=amount
+    log_event("damage", unit=c.name, amount=amount, skill=status, source=source.name)
+
 def apply_status(c, opposing_team):
     if c.hp<=0: return
+    if c.status: log_event("tick", unit=c.name, status=c.status)
     if c.status=="Burned":
-        c.hp-=5
+        status_damage(c,5,"Burned",c)
         c.flash("orange")
         show_status_message(c,"Burned!","orange",c.message_count)
         c.message_count+=1
     elif c.status=="Bleeding":
-        c.hp-=3
+        status_damage(c,3,"Bleeding",c)
         c.flash("red")
         show_status_message(c,"Bleeding!","red",c.message_count)
         c.message_count+=1
@@ -268,7 +458,7 @@ def apply_status(c, opposing_team):
         teammates = players if c.is_player else enemies
         for mate in teammates:
             if mate!=c and mate.hp>0:
-                mate.hp-=3
+                status_damage(mate,3,"Shocked",c)
                 mate.flash("yellow")
                 show_status_message(mate,"Shocked!","yellow",mate.message_count)
                 mate.message_count+=1
@@ -287,12 +477,13 @@ def attack_target(attacker, target, callback=None):
     update_all_visuals()
     ox, oy = attacker.x, attacker.y
     tx, ty = target.turtle.pos()
-    total_hits = random.randint(1,2)
+    total_hits = rng.randint(1,2)
     def damage_hit(hit_num=1):
-        base=random.randint(attacker.attack-2,attacker.attack+2)
-        crit=random.random()<0.2
+        base=rng.randint(attacker.attack-2,attacker.attack+2)
+        crit=rng.random()<0.2
         dmg=base+2 if crit else base
         target.hp-=dmg
+        log_event("damage", unit=target.name, amount=dmg, skill="regular", source=attacker.name)
         clamp_hp(target)
         show_damage(target,dmg,crit,hit_num)
         shake_character(target,intensity=8 if crit else 4)
@@ -304,33 +495,81 @@ def attack_target(attacker, target, callback=None):
             attacker.move_toward(ox,oy,callback=callback)
     attacker.move_toward(tx,ty,callback=lambda: damage_hit(1))
 
+# ---------------------------
+# Damage Preview
+# ---------------------------
+# Hovering an enemy on your turn shows the exact kill chance and mean damage
+# of R and S, now and after the status ticks already on the field.
+STATUS_TICKS={"Burned":5,"Bleeding":3}  # damage to the unit itself per turn
+SHOCK_TICK=3  # damage to each teammate of a Shocked unit per turn
+preview_item=None
+
+def incoming_ticks(target):
+    team=players if target.is_player else enemies
+    ticks=STATUS_TICKS.get(target.status,0)*target.status_duration
+    for mate in team:
+        if mate!=target and mate.hp>0 and mate.status=="Shocked":
+            ticks+=SHOCK_TICK*mate.status_duration
+    return ticks
+
+def attack_preview(action, attacker, target):
+    ticks=incoming_ticks(target)
+    def build():
+        if action==ACTION_SPECIAL:
+            return preview(fixed(attacker.attack+5),ticks,target.hp)
+        a=attacker.attack
+        hit=mix((0.8,uniform(a-2,a+2)),(0.2,uniform(a,a+4)))
+        return preview(mix((0.5,hit),(0.5,convolve(hit,hit))),ticks,target.hp)
+    return cached((action,attacker.attack,target.hp,ticks),build)
+
+def preview_line(key, p):
+    txt=f"{key}: {p.kill:.0%} kill, avg {p.expected:.1f}"
+    if p.expected_over_time!=p.expected:
+        txt+=f" ({p.kill_over_time:.0%} after ticks)"
+    return txt
+
+def preview_hover(x, y):
+    global preview_item
+    target=None
+    if player_turn_pending:
+        for enemy in enemies:
+            if enemy.hp>0 and math.hypot(enemy.turtle.xcor()-x, enemy.turtle.ycor()-y)<30:
+                target=enemy
+                break
+    if preview_item is None:
+        preview_item=renderer.text(0, 0, "", "white", ("Arial", 10, "bold"))
+    if target is None:
+        renderer.hide(preview_item)
+        return
+    lines=[preview_line("R", attack_preview(ACTION_REGULAR, current_character, target))]
+    if current_character.special_cd==0:
+        lines.append(preview_line("S", attack_preview(ACTION_SPECIAL, current_character, target)))
+    renderer.set_text(preview_item, "\n".join(lines))
+    renderer.move(preview_item, target.turtle.xcor(), target.turtle.ycor()-55)
+    renderer.show(preview_item)
+    renderer.frame()
+
+def hide_preview():
+    if preview_item is not None: renderer.hide(preview_item)
+
 # ---------------------------
 # Special Attack Animation
 # ---------------------------
 def special_attack_animation(attacker, target, callback=None):
-    beam = turtle.Turtle()
-    beam.hideturtle()
-    beam.penup()
-    beam.color("purple")
-    beam.width(4)
-    beam.goto(attacker.turtle.pos())
-    beam.showturtle()
-    steps = 15
+    steps = scaled(15, 5)
     step = 0
     ox, oy = attacker.turtle.pos()
     tx, ty = target.turtle.pos()
-    dx = (tx-ox)/steps
-    dy = (ty-oy)/steps
+    beam = renderer.circle(ox, oy, 12, "purple")
     def animate():
         nonlocal step
         if step < steps:
-            beam.goto(beam.xcor()+dx, beam.ycor()+dy)
-            screen.update()
             step +=1
+            renderer.move(beam, ox+(tx-ox)*step/steps, oy+(ty-oy)*step/steps)
+            renderer.frame()
             screen.ontimer(animate,20)
         else:
-            beam.hideturtle()
-            beam.clear()
+            renderer.delete(beam)
             if callback:
                 callback()
     animate()
@@ -347,8 +586,20 @@ current_character=None
 player_turn_pending=False
 selected_enemy=None
 
+def link_ok():
+    if peer is None: return True
+    peer.poll()
+    if peer.desync is not None:
+        print(f"Desync detected at turn {peer.desync}! Stopping.")
+        return False
+    if peer.closed:
+        print("Partner disconnected.")
+        return False
+    return True
+
 def next_turn():
-    global current_character, player_turn_pending
+    global current_character, player_turn_pending, turn_number
+    turn_number += 1
     # Reduce cooldowns for all characters
     for c in players + enemies:
         if c.special_cd > 0:
@@ -357,13 +608,22 @@ def next_turn():
             if c.status_cd[status]>0:
                 c.status_cd[status]-=1
 
+    despawn_dead()
     # Check game over
     if all(p.hp <= 0 for p in players):
+        log_event("battle", result="defeat")
         print("All players defeated! Game Over!")
         return
     if all(e.hp <= 0 for e in enemies):
-        print("All enemies defeated! You win!")
-        return
+        if waves_spawned == len(ENEMY_WAVES):
+            log_event("battle", result="victory")
+            print("All enemies defeated! You win!")
+            return
+        spawn_wave()
+        update_all_visuals()
+    if peer:
+        peer.send_hash(turn_number, state_hash(players+enemies))
+        if not link_ok(): return
 
     if not turn_queue: rebuild_turn_queue()
     while turn_queue:
@@ -372,8 +632,8 @@ def next_turn():
         apply_status(current_character, opposing)
         update_all_visuals()
         if current_character.hp <= 0: continue
+        log_event("turn", unit=current_character.name, turn=turn_number)
         if current_character.status == "Frozen":
-            print(f"{current_character.name} is frozen and skips turn!")
             screen.ontimer(next_turn, 500)
             return
         break
@@ -382,10 +642,14 @@ def next_turn():
         return
 
     if current_character.is_player:
+        if peer and current_character.name != local_unit:
+            print(f"Waiting for partner's {current_character.name}...")
+            wait_for_partner()
+            return
         player_turn_pending = True
         print(f"{current_character.name}'s turn - click enemy, press R for normal, S for special")
     else:
-        tgt = random.choice([p for p in players if p.hp > 0])
+        tgt = rng.choice([p for p in players if p.hp > 0])
         attack_target(current_character, tgt, callback=lambda: screen.ontimer(next_turn, 500))
 
 # ---------------------------
@@ -403,6 +667,8 @@ def select_enemy(x, y):
             print(f"Selected {enemy.name}")
             break
 screen.onclick(select_enemy)
+canvas=screen.getcanvas()
+canvas.bind("<Motion>", lambda ev: preview_hover(canvas.canvasx(ev.x), -canvas.canvasy(ev.y)), add="+")
 
 # ---------------------------
 # Player Attack Functions
@@ -415,9 +681,15 @@ def player_attack_regular():
         print("Select a valid enemy first!")
         return
     player_turn_pending = False
-    attack_target(current_character, selected_enemy, callback=lambda: screen.ontimer(next_turn,500))
+    hide_preview()
+    if peer:
+        peer.send_command(turn_number, ACTION_REGULAR, enemies.index(selected_enemy))
+    do_regular_attack(selected_enemy)
     selected_enemy = None
 
+def do_regular_attack(target):
+    attack_target(current_character, target, callback=lambda: screen.ontimer(next_turn,500))
+
 # ---------------------------
 # Special Attack With Status Choice
 # ---------------------------
@@ -444,18 +716,25 @@ def player_attack_special():
         print(f"Special on cooldown: {current_character.special_cd}")
         return
     player_turn_pending = False
-    target_enemy = selected_enemy
-
+    hide_preview()
     status_choice = choose_status_for_special(current_character)
+    if peer:
+        peer.send_command(turn_number, ACTION_SPECIAL, enemies.index(selected_enemy), status_choice)
+    do_special_attack(selected_enemy, status_choice)
+    selected_enemy = None
 
+def do_special_attack(target_enemy, status_choice):
     def after_special(target=target_enemy):
-        target.hp -= current_character.attack + 5
+        dmg = current_character.attack + 5
+        target.hp -= dmg
+        log_event("damage", unit=target.name, amount=dmg, skill="special", source=current_character.name)
         clamp_hp(target)
         if status_choice:
             target.status = status_choice
             target.status_duration = 2
             current_character.status_cd[status_choice] = 3
-            print(f"{target.name} is now {status_choice}!")
+            log_event("status", unit=target.name, status=status_choice, turns=2, source=current_character.name)
+            log_event("cooldown", unit=current_character.name, skill=status_choice, turns=3)
         update_all_visuals()
         shake_character(target,intensity=10)
         particle_effect(target,count=10,color="purple")
@@ -463,7 +742,22 @@ def player_attack_special():
 
     special_attack_animation(current_character, target_enemy, callback=after_special)
     current_character.special_cd = 3
-    selected_enemy = None
+    log_event("cooldown", unit=current_character.name, skill="special", turns=3)
+
+# ---------------------------
+# Partner's Turn
+# ---------------------------
+def wait_for_partner():
+    if not link_ok(): return
+    cmd = peer.command(turn_number)
+    if cmd is None:
+        screen.ontimer(wait_for_partner, 30)
+        return
+    action, target, status_choice = cmd
+    if action == ACTION_SPECIAL:
+        do_special_attack(enemies[target], status_choice)
+    else:
+        do_regular_attack(enemies[target])
 
 screen.onkey(player_attack_regular, "r")
 screen.onkey(player_attack_special, "s")
@@ -473,8 +767,11 @@ screen.listen()
 # Initialize
 # ---------------------------
 status_turtles={}
+init_hud()
 init_status_icons()
 update_all_visuals()
 rebuild_turn_queue()
+log_event("battle", result="start")
+if ADAPTIVE_EFFECTS: screen.ontimer(governor_tick, FRAME_BUDGET_MS)
 screen.ontimer(next_turn,500)
 screen.mainloop()